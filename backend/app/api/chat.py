@@ -2,19 +2,28 @@
 
 from __future__ import annotations
 
+from typing import AsyncIterator
+
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from app.auth.dependencies import get_current_user
-from app.models.database import get_db
+from app.models.database import get_db, get_session_factory
 from app.models.db import ChatMessage, ChatSession, User
 from app.observability import get_logger
-from app.rag.pipeline import RAGResponse, run_rag
+from app.rag.pipeline import RAGResponse, run_rag, run_rag_stream
 
 log = get_logger(__name__)
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# Ends a streamed answer that failed partway; a JSON object with an "error" key follows it.
+# (ASCII record separator – never part of model output.)
+STREAM_ERROR_MARKER = "\x1e"
+
 
 # ── Schemas ──────────────────────────────────────────────────────────────────
 
@@ -36,7 +45,18 @@ class ChatResponse(BaseModel):
     session_id: int
 
 
-# ── Endpoint ─────────────────────────────────────────────────────────────────
+# ── Endpoints ────────────────────────────────────────────────────────────────
+
+async def _existing_session(db: AsyncSession, session_id: int, user: User) -> ChatSession:
+    from sqlalchemy import select
+    result = await db.execute(
+        select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user.id)
+    )
+    session: ChatSession | None = result.scalar_one_or_none()
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session
+
 
 @router.post("", response_model=ChatResponse)
 async def chat(
@@ -49,16 +69,7 @@ async def chat(
 
     # Session management
     if payload.session_id:
-        from sqlalchemy import select
-        result = await db.execute(
-            select(ChatSession).where(
-                ChatSession.id == payload.session_id,
-                ChatSession.user_id == current_user.id,
-            )
-        )
-        session: ChatSession | None = result.scalar_one_or_none()
-        if session is None:
-            raise HTTPException(status_code=404, detail="Session not found")
+        session = await _existing_session(db, payload.session_id, current_user)
     else:
         session = ChatSession(user_id=current_user.id)
         db.add(session)
@@ -71,9 +82,14 @@ async def chat(
         log.error("rag_error", error=str(exc), question=payload.question[:80])
         raise HTTPException(status_code=502, detail=f"RAG pipeline error: {exc}") from exc
 
-    # Persist messages
-    db.add(ChatMessage(session_id=session.id, role="user", content=payload.question))
-    db.add(ChatMessage(session_id=session.id, role="assistant", content=rag_result.answer))
+    # Persist both messages with a single multi-row INSERT
+    await db.execute(
+        insert(ChatMessage),
+        [
+            {"session_id": session.id, "role": "user", "content": payload.question},
+            {"session_id": session.id, "role": "assistant", "content": rag_result.answer},
+        ],
+    )
     await db.commit()
 
     return ChatResponse(
@@ -87,6 +103,70 @@ async def chat(
     )
 
 
+@router.post("/stream")
+async def chat_stream(
+    payload: ChatRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+):
+    """Streaming :func:`chat`.
+
+    The body is one JSON header line (``citations``, ``has_evidence``,
+    ``session_id``) followed by the answer text as the LLM produces it. The
+    exchange is saved once the answer has been streamed in full; if generation
+    fails partway, the text ends with :data:`STREAM_ERROR_MARKER` and a JSON
+    ``{"error": ...}`` trailer instead, and nothing is saved.
+    """
+    if not payload.question.strip():
+        raise HTTPException(status_code=422, detail="Question cannot be empty")
+
+    session_id = payload.session_id
+    if session_id:
+        await _existing_session(db, session_id, current_user)
+
+    # Retrieval runs up to the header here, so its failures still map to a 502
+    tokens = run_rag_stream(payload.question)
+    try:
+        header = orjson.loads(await anext(tokens))
+    except Exception as exc:
+        log.error("rag_error", error=str(exc), question=payload.question[:80])
+        raise HTTPException(status_code=502, detail=f"RAG pipeline error: {exc}") from exc
+
+    if not session_id:
+        session = ChatSession(user_id=current_user.id)
+        db.add(session)
+        await db.commit()   # the client needs the ID before the answer is complete
+        session_id = session.id
+    header["session_id"] = session_id
+
+    async def body() -> AsyncIterator[str]:
+        yield orjson.dumps(header).decode() + "\n"
+        parts: list[str] = []
+        try:
+            async for token in tokens:
+                parts.append(token)
+                yield token
+        except Exception as exc:
+            log.error("rag_stream_error", error=str(exc), question=payload.question[:80])
+            # the status line is long gone, so signal the failure in-band
+            yield STREAM_ERROR_MARKER + orjson.dumps({"error": f"RAG pipeline error: {exc}"}).decode()
+            return  # a partial answer is not persisted
+
+        # The request's session was closed when the response started
+        async with session_factory() as write_db:
+            await write_db.execute(
+                insert(ChatMessage),
+                [
+                    {"session_id": session_id, "role": "user", "content": payload.question},
+                    {"session_id": session_id, "role": "assistant", "content": "".join(parts)},
+                ],
+            )
+            await write_db.commit()
+
+    return StreamingResponse(body(), media_type="text/plain; charset=utf-8")
+
+
 @router.get("/sessions/{session_id}/history", response_model=list[dict])
 async def session_history(
     session_id: int,
@@ -95,15 +175,21 @@ async def session_history(
 ):
     from sqlalchemy import select
 
+    # Outer join: one round trip, and an owned session with no messages yet (a
+    # stream that failed before its first exchange was saved) still comes back
+    # as one row, with no message.
     result = await db.execute(
-        select(ChatSession).where(
-            ChatSession.id == session_id,
-            ChatSession.user_id == current_user.id,
-        )
+        select(ChatSession.id, ChatMessage)
+        .outerjoin(ChatMessage, ChatMessage.session_id == ChatSession.id)
+        .where(ChatSession.id == session_id, ChatSession.user_id == current_user.id)
+        .order_by(ChatMessage.created_at, ChatMessage.id)
     )
-    session = result.scalar_one_or_none()
-    if session is None:
+    rows = result.all()
+    if not rows:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    msgs = sorted(session.messages, key=lambda m: m.created_at)
-    return [{"role": m.role, "content": m.content, "created_at": m.created_at.isoformat()} for m in msgs]
+    return [
+        {"role": m.role, "content": m.content, "created_at": m.created_at}
+        for _, m in rows
+        if m is not None
+    ]
@@ -41,6 +41,5 @@ async def health(db: AsyncSession = Depends(get_db)):
 
 @router.get("/api/tags")
 async def list_tags(db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Tag))
-    tags = result.scalars().all()
-    return {"tags": [t.name for t in tags]}
+    result = await db.execute(select(Tag.name))
+    return {"tags": list(result.scalars().all())}
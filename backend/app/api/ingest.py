@@ -1,4 +1,4 @@
-"""Document ingestion endpoint.
+"""Document ingestion endpoints.
 
 Only admin users can ingest documents (RBAC).
 Supports: .md, .txt, .pdf, .docx
@@ -6,20 +6,25 @@ Supports: .md, .txt, .pdf, .docx
 
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import io
+from tempfile import SpooledTemporaryFile
 
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.auth.dependencies import require_admin
+from app.auth.dependencies import require_admin_claim
+from app.auth.service import TokenData
 from app.models.database import get_db
 from app.models.db import Document, DocumentChunk, User
 from app.observability import get_logger
-from app.rag.chunker import chunk_document
-from app.rag.embedder import embed_texts
+from app.rag.chunker import Chunk, chunk_document
+from app.rag.embedder import aembed_texts
 from app.rag.vector_store import get_vector_store
 
 log = get_logger(__name__)
@@ -31,6 +36,10 @@ ALLOWED_MIME = {
     "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
 }
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
+READ_BLOCK_SIZE = 64 * 1024
+SPOOL_MAX_MEMORY = 2 * 1024 * 1024  # larger uploads roll over to disk
+MAX_BATCH_FILES = 20
+PIPELINE_QUEUE_SIZE = 4  # documents buffered between batch-ingest stages (backpressure)
 
 
 class IngestResponse(BaseModel):
@@ -58,29 +67,26 @@ def _extract_text(filename: str, content: bytes) -> str:
         raise ValueError(f"Unsupported file type: {ext}")
 
 
-@router.post("", response_model=IngestResponse, status_code=status.HTTP_201_CREATED)
-async def ingest_document(
-    file: UploadFile,
-    admin: User = Depends(require_admin),
-    db: AsyncSession = Depends(get_db),
-):
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=413, detail="File too large (max 10 MB)")
+async def _spool_upload(file: UploadFile) -> tuple[SpooledTemporaryFile, str]:
+    """Copy the upload into a spooled temp file, hashing it block by block.
 
-    content_hash = hashlib.sha256(content).hexdigest()
-    filename = file.filename or "upload"
+    Oversized uploads are rejected as soon as they cross MAX_FILE_SIZE.
+    """
+    hasher = hashlib.sha256()
+    spool = SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    size = 0
+    while block := await file.read(READ_BLOCK_SIZE):
+        size += len(block)
+        if size > MAX_FILE_SIZE:
+            spool.close()
+            raise HTTPException(status_code=413, detail="File too large (max 10 MB)")
+        hasher.update(block)
+        spool.write(block)
+    return spool, hasher.hexdigest()
 
-    # Dedup check
-    existing = await db.execute(select(Document).where(Document.content_hash == content_hash))
-    existing_doc = existing.scalar_one_or_none()
-    if existing_doc:
-        log.info("ingest_deduplicated", filename=filename, hash=content_hash[:12])
-        return IngestResponse(
-            document_id=existing_doc.id, filename=filename, chunks_created=0, deduplicated=True
-        )
 
-    # Parse text
+def _parse_and_chunk(filename: str, content: bytes) -> list[Chunk]:
+    """Extract text and chunk it (CPU-bound; run in a worker thread)."""
     try:
         text = _extract_text(filename, content)
     except Exception as exc:
@@ -89,62 +95,234 @@ async def ingest_document(
     if not text.strip():
         raise HTTPException(status_code=422, detail="Document appears to be empty after parsing")
 
-    # Chunk
     chunks = chunk_document(text, filename)
     if not chunks:
         raise HTTPException(status_code=422, detail="No usable chunks extracted from document")
+    return chunks
+
+
+def _parse_spooled(filename: str, spool: SpooledTemporaryFile) -> list[Chunk]:
+    """Read a spooled upload and chunk it; the bytes live only for this call."""
+    spool.seek(0)
+    return _parse_and_chunk(filename, spool.read())
+
 
-    # Save document record
+async def _save_document(
+    db: AsyncSession, admin: TokenData, filename: str, content_hash: str, chunks: list[Chunk]
+) -> tuple[int, list[int]]:
+    """Insert the document and its chunk rows; return the document ID and chunk IDs."""
     doc = Document(
         filename=filename,
         content_hash=content_hash,
         chunk_count=len(chunks),
-        uploaded_by=admin.id,
+        # resolved inside the INSERT – no separate users lookup
+        uploaded_by=select(User.id).where(User.username == admin.sub).scalar_subquery(),
     )
     db.add(doc)
     await db.flush()  # get doc.id
 
+    # Save chunks in one multi-row INSERT
+    rows = [
+        {"document_id": doc.id, "chunk_index": idx, "text": c.text, "source_label": c.source_label}
+        for idx, c in enumerate(chunks)
+    ]
+    result = await db.execute(
+        insert(DocumentChunk).returning(DocumentChunk.id, sort_by_parameter_order=True), rows
+    )
+    return doc.id, list(result.scalars().all())
+
+
+@router.post("", response_model=IngestResponse, status_code=status.HTTP_201_CREATED)
+async def ingest_document(
+    file: UploadFile,
+    admin: TokenData = Depends(require_admin_claim),
+    db: AsyncSession = Depends(get_db),
+):
+    spool, content_hash = await _spool_upload(file)
+    filename = file.filename or "upload"
+
+    with spool:
+        # Dedup check – before the upload is ever materialised as bytes
+        existing = await db.execute(select(Document.id).where(Document.content_hash == content_hash))
+        existing_id = existing.scalar_one_or_none()
+        if existing_id is not None:
+            log.info("ingest_deduplicated", filename=filename, hash=content_hash[:12])
+            return IngestResponse(
+                document_id=existing_id, filename=filename, chunks_created=0, deduplicated=True
+            )
+
+        spool.seek(0)
+        content = spool.read()
+
+    # Parse text and chunk
+    chunks = await asyncio.to_thread(_parse_and_chunk, filename, content)
+
     # Embed all chunks in one batch
     texts = [c.text for c in chunks]
-    vectors = embed_texts(texts)
+    vectors = await aembed_texts(texts)
 
-    # Save chunks + index into vector store
+    # Save document + chunk rows, then index into vector store
+    doc_id, chunk_ids = await _save_document(db, admin, filename, content_hash, chunks)
     store = get_vector_store()
-    chunk_records: list[DocumentChunk] = []
-    for idx, (c, vec) in enumerate(zip(chunks, vectors)):
-        rec = DocumentChunk(
-            document_id=doc.id,
-            chunk_index=idx,
-            text=c.text,
-            source_label=c.source_label,
-        )
-        db.add(rec)
-        chunk_records.append(rec)
+    await store.add_many(
+        chunk_ids=chunk_ids,
+        texts=texts,
+        source_labels=[c.source_label for c in chunks],
+        vectors=vectors,
+    )
+
+    await db.commit()
+    await store.flush()
+
+    log.info("ingest_complete", document_id=doc_id, filename=filename, chunks=len(chunks))
+    return IngestResponse(document_id=doc_id, filename=filename, chunks_created=len(chunks), deduplicated=False)
 
-    await db.flush()  # get chunk IDs
 
-    for rec, vec in zip(chunk_records, vectors):
-        await store.add(
-            chunk_id=rec.id,
-            text=rec.text,
-            source_label=rec.source_label,
-            vector=vec,
+@router.post("/batch", response_model=list[IngestResponse], status_code=status.HTTP_201_CREATED)
+async def ingest_documents(
+    files: list[UploadFile],
+    admin: TokenData = Depends(require_admin_claim),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ingest several documents as one pipelined, all-or-nothing batch.
+
+    Parsing/chunking, embedding and the database writes run as three stages
+    connected by bounded queues, so document B is chunked while A is embedded
+    and A's rows are written while B is embedded. The first failure aborts the
+    batch and nothing is committed or indexed.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=422, detail=f"Too many files (max {MAX_BATCH_FILES})")
+
+    # Uploads stay spooled (on disk past SPOOL_MAX_MEMORY) until their chunk stage reads them
+    uploads: list[tuple[str, str, SpooledTemporaryFile]] = []
+    try:
+        for file in files:
+            spool, content_hash = await _spool_upload(file)
+            uploads.append((file.filename or "upload", content_hash, spool))
+        return await _ingest_batch(db, admin, uploads)
+    finally:
+        for _, _, spool in uploads:
+            spool.close()
+
+
+async def _ingest_batch(
+    db: AsyncSession, admin: TokenData, uploads: list[tuple[str, str, SpooledTemporaryFile]]
+) -> list[IngestResponse]:
+    """Dedup by content hash, then run the chunk → embed → write pipeline over the rest."""
+    # Dedup against stored documents in one query, and within the batch itself
+    existing = await db.execute(
+        select(Document.content_hash, Document.id).where(
+            Document.content_hash.in_({h for _, h, _ in uploads})
+        )
+    )
+    known: dict[str, int] = dict(existing.all())   # content hash -> document ID
+    responses: list[IngestResponse | None] = [None] * len(uploads)
+    pending: list[tuple[int, str, str, SpooledTemporaryFile]] = []   # (response slot, filename, hash, upload)
+    twins: list[tuple[int, str, str]] = []            # repeats of a file earlier in this batch
+    batch_hashes: set[str] = set()
+    for slot, (filename, content_hash, spool) in enumerate(uploads):
+        if content_hash in known:
+            log.info("ingest_deduplicated", filename=filename, hash=content_hash[:12])
+            responses[slot] = IngestResponse(
+                document_id=known[content_hash], filename=filename, chunks_created=0, deduplicated=True
+            )
+        elif content_hash in batch_hashes:
+            twins.append((slot, filename, content_hash))
+        else:
+            batch_hashes.add(content_hash)
+            pending.append((slot, filename, content_hash, spool))
+
+    chunked: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    embedded: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    index_ids: list[int] = []
+    index_texts: list[str] = []
+    index_labels: list[str] = []
+    index_vectors: list[np.ndarray] = []
+
+    failures: list[Exception] = []   # first entry is re-raised once the stages have wound down
+
+    async def chunk_stage() -> None:
+        try:
+            for slot, filename, content_hash, spool in pending:
+                if failures:
+                    break
+                chunks = await asyncio.to_thread(_parse_spooled, filename, spool)
+                await chunked.put((slot, filename, content_hash, chunks))
+        except Exception as exc:
+            failures.append(exc)
+        finally:
+            await chunked.put(None)
+
+    async def embed_stage() -> None:
+        while (item := await chunked.get()) is not None:
+            if failures:
+                continue  # keep draining so the upstream stage never blocks on a full queue
+            try:
+                vectors = await aembed_texts([c.text for c in item[3]])
+            except Exception as exc:
+                failures.append(exc)
+                continue
+            await embedded.put((*item, vectors))
+        await embedded.put(None)
+
+    async def write_stage() -> None:
+        # sole user of the DB session
+        while (item := await embedded.get()) is not None:
+            if failures:
+                continue
+            slot, filename, content_hash, chunks, vectors = item
+            try:
+                doc_id, chunk_ids = await _save_document(db, admin, filename, content_hash, chunks)
+            except Exception as exc:
+                failures.append(exc)
+                continue
+            index_ids.extend(chunk_ids)
+            index_texts.extend(c.text for c in chunks)
+            index_labels.extend(c.source_label for c in chunks)
+            index_vectors.append(vectors)
+            known[content_hash] = doc_id
+            responses[slot] = IngestResponse(
+                document_id=doc_id, filename=filename, chunks_created=len(chunks), deduplicated=False
+            )
+
+    # Stages stop at their next item boundary after a failure rather than being
+    # cancelled mid-statement; the uncommitted rows are rolled back with the session.
+    await asyncio.gather(chunk_stage(), embed_stage(), write_stage())
+    if failures:
+        raise failures[0]
+
+    # Index everything in one call, only once every document made it through
+    if index_ids:
+        store = get_vector_store()
+        await store.add_many(
+            chunk_ids=index_ids,
+            texts=index_texts,
+            source_labels=index_labels,
+            vectors=np.concatenate(index_vectors),
         )
+        await db.commit()
+        await store.flush()
 
-    await db.commit()
-    await store.flush()
+    for slot, filename, content_hash in twins:
+        responses[slot] = IngestResponse(
+            document_id=known[content_hash], filename=filename, chunks_created=0, deduplicated=True
+        )
 
-    log.info("ingest_complete", document_id=doc.id, filename=filename, chunks=len(chunks))
-    return IngestResponse(document_id=doc.id, filename=filename, chunks_created=len(chunks), deduplicated=False)
+    log.info("ingest_batch_complete", files=len(uploads), ingested=len(pending))
+    return responses
 
 
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: int,
-    admin: User = Depends(require_admin),
+    admin: TokenData = Depends(require_admin_claim),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Document).where(Document.id == document_id))
+    # chunks loaded up front: a lazy load can't run under AsyncSession
+    result = await db.execute(
+        select(Document).options(selectinload(Document.chunks)).where(Document.id == document_id)
+    )
     doc: Document | None = result.scalar_one_or_none()
     if doc is None:
         raise HTTPException(status_code=404, detail="Document not found")
@@ -160,17 +338,18 @@ async def delete_document(
 
 @router.get("", response_model=list[dict])
 async def list_documents(
-    admin: User = Depends(require_admin),
+    admin: TokenData = Depends(require_admin_claim),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Document))
-    docs = result.scalars().all()
+    result = await db.execute(
+        select(Document.id, Document.filename, Document.chunk_count, Document.created_at)
+    )
     return [
         {
-            "id": d.id,
-            "filename": d.filename,
-            "chunk_count": d.chunk_count,
-            "created_at": d.created_at.isoformat(),
+            "id": doc_id,
+            "filename": filename,
+            "chunk_count": chunk_count,
+            "created_at": created_at,
         }
-        for d in docs
+        for doc_id, filename, chunk_count, created_at in result.all()
     ]
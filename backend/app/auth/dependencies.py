@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
 from app.auth.service import TokenData, decode_token
 from app.models.database import get_db
@@ -13,10 +15,33 @@ from app.models.db import User
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+# username -> User column values, so authenticated calls skip the users SELECT.
+# Each hit builds a fresh detached User, so request handlers never share an instance.
+_user_cache: TTLCache[str, dict] = TTLCache(maxsize=1024, ttl=30)
 
-async def _get_token_data(
-    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
-) -> TokenData:
+
+def invalidate_cached_user(username: str) -> None:
+    """Drop a cached user; call after any write to that user's row."""
+    _user_cache.pop(username, None)
+
+
+def _cache_user(user: User) -> None:
+    _user_cache[user.username] = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+
+
+def _cached_user(username: str) -> User | None:
+    row = _user_cache.get(username)
+    if row is None:
+        return None
+    user = User(**row)
+    make_transient_to_detached(user)
+    return user
+
+
+# get_current_user resolves straight from the bearer header, so every
+# authenticated request solves a flat graph: bearer_scheme + get_db.
+
+def _token_data(credentials: HTTPAuthorizationCredentials | None) -> TokenData:
     if credentials is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     try:
@@ -25,18 +50,34 @@ async def _get_token_data(
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
 
-async def get_current_user(
-    token_data: TokenData = Depends(_get_token_data),
-    db: AsyncSession = Depends(get_db),
-) -> User:
+async def _load_user(token_data: TokenData, db: AsyncSession) -> User:
+    user = _cached_user(token_data.sub)
+    if user is not None:
+        return user
+
     result = await db.execute(select(User).where(User.username == token_data.sub))
     user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    _cache_user(user)
     return user
 
 
-async def require_admin(current_user: User = Depends(get_current_user)) -> User:
-    if not current_user.is_admin:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    return await _load_user(_token_data(credentials), db)
+
+
+async def require_admin_claim(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+) -> TokenData:
+    """Admin guard that trusts the signed ``is_admin`` JWT claim, without touching the DB.
+
+    A demotion therefore only takes effect once the admin's current token expires.
+    """
+    token_data = _token_data(credentials)
+    if not token_data.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
-    return current_user
+    return token_data
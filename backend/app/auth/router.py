@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.dependencies import get_current_user
+from app.auth.dependencies import get_current_user, invalidate_cached_user
 from app.auth.service import create_access_token, hash_password, verify_password, TokenData
 from app.models.database import get_db
 from app.models.db import User
@@ -45,6 +47,18 @@ class UpdateProfileRequest(BaseModel):
     image: str | None = None
 
 
+def _user_out(user: User, token: str | None = None) -> UserOut:
+    # Values come straight from the ORM row, so skip validation and the copy pass.
+    return UserOut.model_construct(
+        username=user.username,
+        email=user.email,
+        bio=user.bio,
+        image=user.image,
+        is_admin=user.is_admin,
+        token=token,
+    )
+
+
 # ── Endpoints ────────────────────────────────────────────────────────────────
 
 @router.post("", response_model=UserOut, status_code=status.HTTP_201_CREATED)
@@ -58,28 +72,28 @@ async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_db))
     user = User(
         username=payload.username,
         email=payload.email,
-        hashed_password=hash_password(payload.password),
+        hashed_password=await asyncio.to_thread(hash_password, payload.password),
     )
     db.add(user)
     await db.commit()
     await db.refresh(user)
     token = create_access_token(TokenData(sub=user.username, is_admin=user.is_admin))
-    return UserOut.model_validate(user).model_copy(update={"token": token})
+    return _user_out(user, token)
 
 
 @router.post("/login", response_model=UserOut)
 async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == payload.email))
     user: User | None = result.scalar_one_or_none()
-    if user is None or not verify_password(payload.password, user.hashed_password):
+    if user is None or not await asyncio.to_thread(verify_password, payload.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     token = create_access_token(TokenData(sub=user.username, is_admin=user.is_admin))
-    return UserOut.model_validate(user).model_copy(update={"token": token})
+    return _user_out(user, token)
 
 
 @router.get("/me", response_model=UserOut)
 async def get_me(current_user: User = Depends(get_current_user)):
-    return UserOut.model_validate(current_user)
+    return _user_out(current_user)
 
 
 @router.put("/me", response_model=UserOut)
@@ -94,5 +108,6 @@ async def update_profile(
         current_user.image = payload.image
     db.add(current_user)
     await db.commit()
+    invalidate_cached_user(current_user.username)
     await db.refresh(current_user)
-    return UserOut.model_validate(current_user)
+    return _user_out(current_user)
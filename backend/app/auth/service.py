@@ -2,28 +2,31 @@
 
 from __future__ import annotations
 
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
+import bcrypt
+from cachetools import TTLCache
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 class TokenData(BaseModel):
     sub: str          # username
     is_admin: bool = False
 
 
+# bcrypt is deliberately slow (~100+ ms); call these via asyncio.to_thread from async code.
+
 def hash_password(plain: str) -> str:
-    return pwd_context.hash(plain)
+    return bcrypt.hashpw(plain.encode(), bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)).decode()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return bcrypt.checkpw(plain.encode(), hashed.encode())
 
 
 def create_access_token(data: TokenData, expires_delta: timedelta | None = None) -> str:
@@ -34,9 +37,28 @@ def create_access_token(data: TokenData, expires_delta: timedelta | None = None)
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+# Raw token -> (decoded claims, exp). Clients resend the same token on every call,
+# so this skips the HMAC check + JSON parse for all but the first request.
+_token_cache: TTLCache[str, tuple[TokenData, float]] = TTLCache(maxsize=4096, ttl=60)
+_token_cache_lock = threading.Lock()
+
+
 def decode_token(token: str) -> TokenData:
+    with _token_cache_lock:
+        cached = _token_cache.get(token)
+    if cached is not None:
+        data, exp = cached
+        if exp > time.time():
+            return data
+        raise ValueError("Invalid or expired token")
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return TokenData(sub=payload["sub"], is_admin=payload.get("is_admin", False))
+        data = TokenData(sub=payload["sub"], is_admin=payload.get("is_admin", False))
     except JWTError as exc:
         raise ValueError("Invalid or expired token") from exc
+
+    if "exp" in payload:
+        with _token_cache_lock:
+            _token_cache[token] = (data, float(payload["exp"]))
+    return data
@@ -7,6 +7,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.chat import router as chat_router
 from app.api.health import router as health_router
@@ -15,6 +16,9 @@ from app.auth.router import router as auth_router
 from app.config import settings
 from app.models.database import create_db_and_tables
 from app.observability import configure_logging, get_logger
+from app.rag.embedder import shutdown_query_batcher
+from app.rag.llm import shutdown_llm_client
+from app.rag.vector_store import get_vector_store
 
 configure_logging(settings.LOG_LEVEL)
 log = get_logger(__name__)
@@ -27,7 +31,13 @@ async def lifespan(app: FastAPI):
     log.info("startup", app=settings.APP_NAME, version=settings.APP_VERSION)
     await create_db_and_tables()
     log.info("database_ready")
+    store = get_vector_store()  # load the index now rather than on the first request
+    await store.prepare()       # pgvector: schema now, ANN index build in the background
+    log.info("vector_store_ready", store=type(store).__name__)
     yield
+    await store.aclose()
+    await shutdown_query_batcher()
+    await shutdown_llm_client()
     log.info("shutdown")
 
 
@@ -39,6 +49,7 @@ app = FastAPI(
         "Ask questions about the professional profile; get factual, cited answers."
     ),
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
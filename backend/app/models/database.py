@@ -7,7 +7,9 @@ from __future__ import annotations
 
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.config import VectorStoreMode, settings
 from app.models.db import Base
@@ -16,12 +18,50 @@ from app.models.db import Base
 def _make_engine():
     if settings.VECTOR_STORE_MODE == VectorStoreMode.DEV:
         url = f"sqlite+aiosqlite:///{settings.SQLITE_PATH}"
-        return create_async_engine(url, echo=settings.DEBUG, connect_args={"check_same_thread": False})
+        if settings.SQLITE_PATH == ":memory:":
+            # A private in-memory database lives and dies with its connection,
+            # so every session shares the one connection (used by the tests).
+            return create_async_engine(
+                url,
+                echo=settings.DEBUG,
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+            )
+        # aiosqlite runs each connection on its own thread; sharing pooled
+        # connections across tasks only adds contention, so open per session.
+        return create_async_engine(
+            url,
+            echo=settings.DEBUG,
+            poolclass=NullPool,
+            connect_args={"check_same_thread": False},
+        )
     else:
-        return create_async_engine(settings.POSTGRES_DSN, echo=settings.DEBUG, pool_size=10, max_overflow=20)
+        return create_async_engine(
+            settings.POSTGRES_DSN,
+            echo=settings.DEBUG,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,  # survive idle connections dropped by the server / proxy
+        )
 
 
 engine = _make_engine()
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+        # WAL lets readers run alongside the single writer; NORMAL drops the
+        # per-commit fsync (still crash-safe in WAL mode).
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        cursor.close()
+
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
 
@@ -33,3 +73,12 @@ async def create_db_and_tables() -> None:
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory for work that outlives the request's own session.
+
+    FastAPI closes ``get_db`` sessions before a streamed body is sent, so a
+    generator that writes afterwards opens its own session from this.
+    """
+    return AsyncSessionLocal
@@ -0,0 +1,140 @@
+"""Semantic answer cache for the RAG pipeline.
+
+Repeat and paraphrased questions are common (sample questions, FAQs). The cache
+lets them skip the LLM call, which is by far the most expensive stage:
+
+1. Query embeddings are bucketed with random-projection LSH (several tables of
+   sign bits), so a lookup only compares against a handful of candidates.
+2. A candidate matches when its cosine similarity to the new query is above
+   ``min_similarity``.
+3. A match is only served when the evidence retrieved *now* overlaps the
+   evidence the cached answer was grounded on (Jaccard over evidence keys).
+   Keys are content hashes of the retrieved chunks, not their row IDs: SQLite
+   reuses the IDs of deleted rows, so a deleted-then-edited document could
+   otherwise pass for the old one. Editing or deleting a document changes the
+   evidence and so invalidates stale answers, in every worker process.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from app.rag.pipeline import RAGResponse
+
+
+@dataclass(eq=False)   # identity semantics: entries are removed from buckets by identity
+class _Entry:
+    query_vector: np.ndarray
+    evidence: frozenset[int]
+    response: RAGResponse
+    keys: tuple[int, ...]        # bucket key per LSH table
+
+
+def _jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticAnswerCache:
+    """In-process LSH cache of RAG answers, evicted FIFO beyond ``max_entries``."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        min_similarity: float = 0.97,
+        min_evidence_overlap: float = 0.8,
+        n_tables: int = 4,
+        n_planes: int = 8,
+        seed: int = 0,
+    ) -> None:
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.min_evidence_overlap = min_evidence_overlap
+        self._n_tables = n_tables
+        self._n_planes = n_planes
+        self._rng = np.random.default_rng(seed)
+        self._planes: np.ndarray | None = None   # (n_tables * n_planes, D), built on first use
+        self._bit_weights = 1 << np.arange(n_planes, dtype=np.int64)
+        self._tables: list[dict[int, list[_Entry]]] = [{} for _ in range(n_tables)]
+        self._entries: deque[_Entry] = deque()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, vector: np.ndarray) -> tuple[int, ...]:
+        if self._planes is None:
+            self._planes = self._rng.standard_normal(
+                (self._n_tables * self._n_planes, vector.shape[0])
+            ).astype(np.float32)
+        bits = (self._planes @ vector > 0).reshape(self._n_tables, self._n_planes)
+        return tuple(int(k) for k in bits @ self._bit_weights)
+
+    def lookup(self, query_vector: np.ndarray, evidence: list[int]) -> RAGResponse | None:
+        """Return a cached answer for a near-identical query grounded on the same evidence."""
+        if not self._entries:
+            return None
+        keys = self._keys(query_vector)
+        current = frozenset(evidence)
+
+        best: _Entry | None = None
+        best_sim = self.min_similarity
+        seen: set[_Entry] = set()
+        for table, key in zip(self._tables, keys):
+            for entry in table.get(key, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                # vectors are L2-normalised, so the dot product is the cosine
+                sim = float(np.dot(entry.query_vector, query_vector))
+                if sim >= best_sim and _jaccard(entry.evidence, current) >= self.min_evidence_overlap:
+                    best, best_sim = entry, sim
+        return best.response if best is not None else None
+
+    def insert(self, query_vector: np.ndarray, evidence: list[int], response: RAGResponse) -> None:
+        entry = _Entry(
+            query_vector=query_vector,
+            evidence=frozenset(evidence),
+            response=response,
+            keys=self._keys(query_vector),
+        )
+        for table, key in zip(self._tables, entry.keys):
+            table.setdefault(key, []).append(entry)
+        self._entries.append(entry)
+        while len(self._entries) > self.max_entries:
+            self._evict(self._entries.popleft())
+
+    def _evict(self, entry: _Entry) -> None:
+        for table, key in zip(self._tables, entry.keys):
+            bucket = table[key]
+            bucket.remove(entry)
+            if not bucket:
+                del table[key]
+
+    def clear(self) -> None:
+        for table in self._tables:
+            table.clear()
+        self._entries.clear()
+
+
+# ── Factory ───────────────────────────────────────────────────────────────────
+
+_cache: SemanticAnswerCache | None = None
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    global _cache
+    if _cache is None:
+        _cache = SemanticAnswerCache(
+            max_entries=settings.ANSWER_CACHE_SIZE,
+            min_similarity=settings.ANSWER_CACHE_MIN_SIMILARITY,
+            min_evidence_overlap=settings.ANSWER_CACHE_MIN_OVERLAP,
+        )
+    return _cache
@@ -9,29 +9,43 @@ Strategy
 
 from __future__ import annotations
 
-import hashlib
 import re
-from dataclasses import dataclass, field
+from itertools import chain, pairwise
+from dataclasses import dataclass
+
+import numpy as np
+import xxhash
+from numba import njit
 
 from app.config import settings
 
 
-@dataclass
+@dataclass(slots=True)
 class Chunk:
     text: str
     source_label: str           # e.g.  "cv.md § Experience > Senior Engineer"
     document_filename: str
     chunk_index: int
-    content_hash: str = field(init=False)
+    content_hash: str = ""      # dedup key only; computed from text when not given
 
     def __post_init__(self) -> None:
-        self.content_hash = hashlib.sha256(self.text.encode()).hexdigest()
+        if not self.content_hash:
+            self.content_hash = _chunk_hash(self.text)
 
 
 # ── helpers ──────────────────────────────────────────────────────────────────
 
+def _chunk_hash(text: str) -> str:
+    # Non-cryptographic: the hash only deduplicates chunks within a document.
+    return xxhash.xxh3_128_hexdigest(text)
+
+
 _HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$", re.MULTILINE)
-_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _collapse_whitespace(text: str) -> str:
+    # str.split() splits on the same characters as r"\s+" but runs ~4x faster than re.sub
+    return " ".join(text.split())
 
 
 def _naive_token_count(text: str) -> int:
@@ -39,30 +53,63 @@ def _naive_token_count(text: str) -> int:
     return max(1, len(text) // 4)
 
 
-def _split_by_tokens(text: str, max_tokens: int, overlap_tokens: int) -> list[str]:
-    """Sliding window over words respecting max_tokens budget."""
-    words = text.split()
-    chunks: list[str] = []
+@njit(cache=True)
+def _compute_chunk_bounds(word_chars: np.ndarray, max_tokens: int, overlap_tokens: int) -> np.ndarray:
+    """Return ``(start, end)`` word offsets of each sliding-window chunk."""
+    n = word_chars.shape[0]
+    # Exclusive prefix sums: sum over words[a:b] == prefix[b] - prefix[a]
+    token_prefix = np.zeros(n + 1, dtype=np.int64)
+    token_prefix[1:] = np.cumsum(np.maximum(1, word_chars // 4))
+    char_prefix = np.zeros(n + 1, dtype=np.int64)
+    char_prefix[1:] = np.cumsum(word_chars)
+    overlap_chars = overlap_tokens * 4
+
+    bounds = np.empty((n, 2), dtype=np.int64)   # every step advances start, so <= n chunks
+    count = 0
     start = 0
-    while start < len(words):
-        end = start
-        token_count = 0
-        while end < len(words) and token_count < max_tokens:
-            token_count += max(1, len(words[end]) // 4)
-            end += 1
-        chunk_text = " ".join(words[start:end]).strip()
-        if chunk_text:
-            chunks.append(chunk_text)
-        if end >= len(words):
+    while start < n:
+        # first end whose window reaches the budget (or the last word)
+        end = min(n, np.searchsorted(token_prefix, token_prefix[start] + max_tokens))
+        end = max(end, start + 1)
+        bounds[count, 0] = start
+        bounds[count, 1] = end
+        count += 1
+        if end >= n:
             break
-        # step back by overlap
-        overlap_chars = 0
-        step_end = end
-        while step_end > start and overlap_chars < overlap_tokens * 4:
-            step_end -= 1
-            overlap_chars += len(words[step_end])
-        start = max(start + 1, step_end)
-    return chunks
+        # step back to the last start that keeps >= overlap_chars of trailing text
+        step_end = np.searchsorted(char_prefix, char_prefix[end] - overlap_chars, side="right") - 1
+        start = max(start + 1, min(step_end, end))
+    return bounds[:count]
+
+
+# Compile (or load from the on-disk cache) at import, not on the first upload.
+_compute_chunk_bounds(np.ones(2, dtype=np.int64), 1, 1)
+
+
+# Code points str.split() treats as separators (all of them are below U+3001)
+_SPACE_CODEPOINTS = np.array([c for c in range(0x3001) if chr(c).isspace()], dtype=np.uint32)
+
+
+def _word_spans(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(starts, ends)`` character offsets of the whitespace-separated words."""
+    codepoints = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    is_word = np.zeros(len(codepoints) + 2, dtype=np.int8)
+    is_word[1:-1] = ~np.isin(codepoints, _SPACE_CODEPOINTS)
+    edges = np.diff(is_word)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _split_by_tokens(text: str, max_tokens: int, overlap_tokens: int) -> list[str]:
+    """Sliding window over words respecting max_tokens budget.
+
+    Chunks are slices of ``text`` (no split/join), so whitespace inside a chunk
+    is kept as is; callers pass whitespace-normalised section bodies.
+    """
+    starts, ends = _word_spans(text)
+    if not len(starts):
+        return []
+    bounds = _compute_chunk_bounds(ends - starts, max_tokens, overlap_tokens)
+    return [text[starts[first]:ends[last - 1]] for first, last in bounds.tolist()]
 
 
 # ── public API ────────────────────────────────────────────────────────────────
@@ -82,16 +129,19 @@ def chunk_document(text: str, filename: str) -> list[Chunk]:
             overlap_tokens=settings.CHUNK_OVERLAP,
         )
         for raw in token_chunks:
-            c = Chunk(
-                text=raw,
-                source_label=label,
-                document_filename=filename,
-                chunk_index=idx,
-            )
-            if c.content_hash in seen_hashes:
+            h = _chunk_hash(raw)
+            if h in seen_hashes:
                 continue  # deduplicate
-            seen_hashes.add(c.content_hash)
-            chunks.append(c)
+            seen_hashes.add(h)
+            chunks.append(
+                Chunk(
+                    text=raw,
+                    source_label=label,
+                    document_filename=filename,
+                    chunk_index=idx,
+                    content_hash=h,
+                )
+            )
             idx += 1
 
     return chunks
@@ -99,22 +149,23 @@ def chunk_document(text: str, filename: str) -> list[Chunk]:
 
 def _extract_sections(text: str) -> list[tuple[str, str]]:
     """Split markdown by headings; falls back to treating the whole text as one section."""
-    matches = list(_HEADING_RE.finditer(text))
-    if not matches:
-        return [("document", text)]
+    matches = _HEADING_RE.finditer(text)
+    first = next(matches, None)
+    if first is None:
+        return [("document", _collapse_whitespace(text))]
 
     sections: list[tuple[str, str]] = []
-    for i, m in enumerate(matches):
+    # Content before first heading
+    preamble = _collapse_whitespace(text[: first.start()])
+    if preamble:
+        sections.append(("preamble", preamble))
+
+    # Each heading's body runs to the next heading (or end of text); one Match alive at a time
+    for m, nxt in pairwise(chain((first,), matches, (None,))):
         title = m.group(2).strip()
-        body_start = m.end()
-        body_end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
-        body = _WHITESPACE_RE.sub(" ", text[body_start:body_end]).strip()
+        body_end = nxt.start() if nxt is not None else len(text)
+        body = _collapse_whitespace(text[m.end():body_end])
         if body:
             sections.append((title, body))
 
-    # Content before first heading
-    preamble = text[: matches[0].start()].strip()
-    if preamble:
-        sections.insert(0, ("preamble", preamble))
-
     return sections
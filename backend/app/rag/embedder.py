@@ -1,12 +1,20 @@
 """Local embedding generation using sentence-transformers.
 
 The model is downloaded on first use and cached in ~/.cache/huggingface.
-No API key required.
+No API key required. Set EMBEDDING_BACKEND=onnx to serve it with ONNX Runtime
+instead of PyTorch (noticeably faster on CPU), or EMBEDDING_QUANTIZE=true for the
+dynamically quantised INT8 ONNX model (faster still, ~4x smaller).
 """
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import os
+import threading
+
 import numpy as np
+from cachetools import LRUCache
 from functools import lru_cache
 
 from app.config import settings
@@ -14,13 +22,47 @@ from app.observability import get_logger
 
 log = get_logger(__name__)
 
+# One forward pass at a time: the model is shared, and concurrent encodes just
+# fight over the same cores / GPU.
+_encode_slot = asyncio.Semaphore(1)
+
+
+_QINT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
 
 @lru_cache(maxsize=1)
 def _get_model():
     from sentence_transformers import SentenceTransformer  # lazy import
 
-    log.info("loading_embedding_model", model=settings.EMBEDDING_MODEL)
-    return SentenceTransformer(settings.EMBEDDING_MODEL)
+    if settings.EMBEDDING_QUANTIZE:
+        return _load_quantized_model()
+
+    log.info("loading_embedding_model", model=settings.EMBEDDING_MODEL, backend=settings.EMBEDDING_BACKEND)
+    # The ONNX backend exports the model on first load if the hub repo has no
+    # ONNX weights, then runs it through ONNX Runtime's fused CPU kernels.
+    return SentenceTransformer(settings.EMBEDDING_MODEL, backend=settings.EMBEDDING_BACKEND)
+
+
+def _load_quantized_model():
+    """Load the dynamic INT8 (AVX512-VNNI) ONNX variant, exporting it once if needed."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model  # lazy import
+
+    log.info("loading_embedding_model", model=settings.EMBEDDING_MODEL, backend="onnx", quantized=True)
+    try:
+        # Many hub repos (incl. all-MiniLM-L6-v2) already publish this file.
+        return SentenceTransformer(
+            settings.EMBEDDING_MODEL, backend="onnx", model_kwargs={"file_name": _QINT8_FILE}
+        )
+    except Exception as exc:
+        log.info("quantized_embedding_model_unavailable", error=str(exc))
+
+    local_dir = os.path.join(settings.EMBEDDING_EXPORT_DIR, settings.EMBEDDING_MODEL.replace("/", "__"))
+    if not os.path.exists(os.path.join(local_dir, _QINT8_FILE)):
+        log.info("exporting_quantized_embedding_model", path=local_dir)
+        model = SentenceTransformer(settings.EMBEDDING_MODEL, backend="onnx")
+        model.save(local_dir)
+        export_dynamic_quantized_onnx_model(model, "avx512_vnni", local_dir)
+    return SentenceTransformer(local_dir, backend="onnx", model_kwargs={"file_name": _QINT8_FILE})
 
 
 def embed_texts(texts: list[str]) -> np.ndarray:
@@ -28,10 +70,141 @@ def embed_texts(texts: list[str]) -> np.ndarray:
     if not texts:
         return np.empty((0,), dtype=np.float32)
     model = _get_model()
-    vectors = model.encode(texts, normalize_embeddings=True, show_progress_bar=False)
+    vectors = model.encode(
+        texts,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
     return vectors.astype(np.float32)
 
 
-def embed_query(query: str) -> np.ndarray:
-    """Return float32 1-D array of shape (D,)."""
-    return embed_texts([query])[0]
+async def aembed_texts(texts: list[str]) -> np.ndarray:
+    """Async variant of :func:`embed_texts` that runs the encode in a worker thread.
+
+    The encode slot is taken once per ``EMBEDDING_BATCH_SIZE`` slice rather than
+    for the whole list, so queued chat queries get their turn between a large
+    document's batches instead of waiting for all of it (the semaphore is FIFO).
+    """
+    if not texts:
+        return embed_texts(texts)
+    step = settings.EMBEDDING_BATCH_SIZE
+    parts: list[np.ndarray] = []
+    for start in range(0, len(texts), step):
+        async with _encode_slot:
+            parts.append(await asyncio.to_thread(embed_texts, texts[start : start + step]))
+    return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+
+# ── Query cache ───────────────────────────────────────────────────────────────
+
+# Repeat questions (sample prompts, FAQs) skip the forward pass. Keys are
+# whitespace-collapsed, and lower-cased only when the model's tokenizer is
+# uncased (e.g. the default MiniLM), so only same-embedding queries share an
+# entry; the model itself always sees the query as typed. Values are the raw
+# float32 bytes, so a cached vector can never be mutated in place by a caller.
+_query_cache: LRUCache[str, bytes] = LRUCache(maxsize=settings.EMBEDDING_QUERY_CACHE_SIZE)
+_query_cache_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _tokenizer_lowercases() -> bool:
+    return bool(getattr(_get_model().tokenizer, "do_lower_case", False))
+
+
+def _normalize_query(query: str) -> str:
+    if _tokenizer_lowercases():
+        query = query.lower()
+    return " ".join(query.split())
+
+
+def _cached_query_vector(key: str) -> np.ndarray | None:
+    with _query_cache_lock:
+        buf = _query_cache.get(key)
+    return None if buf is None else np.frombuffer(buf, dtype=np.float32)
+
+
+def _cache_query_vector(key: str, vector: np.ndarray) -> None:
+    with _query_cache_lock:
+        _query_cache[key] = vector.astype(np.float32, copy=False).tobytes()
+
+
+# ── Query batching ────────────────────────────────────────────────────────────
+
+class _QueryBatcher:
+    """Coalesces concurrent query embeddings into one forward pass.
+
+    A single-query encode leaves the model's matmuls mostly idle; under load,
+    queries that arrive within ``max_wait`` of each other share one batch.
+    """
+
+    def __init__(self, max_batch: int, max_wait: float) -> None:
+        self._max_batch = max_batch
+        self._max_wait = max_wait
+        self._queue: asyncio.Queue[tuple[str, asyncio.Future[np.ndarray]]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def embed(self, query: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            # (re)start the drain task on the current loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run(self._queue))
+        fut: asyncio.Future[np.ndarray] = loop.create_future()
+        self._queue.put_nowait((query, fut))
+        return await fut
+
+    async def aclose(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+
+    async def _run(self, queue: asyncio.Queue[tuple[str, asyncio.Future[np.ndarray]]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await aembed_texts([q for q, _ in batch])
+            except Exception as exc:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            for (_, fut), vec in zip(batch, vectors):
+                if not fut.done():
+                    fut.set_result(vec)
+
+
+_query_batcher = _QueryBatcher(
+    max_batch=settings.EMBEDDING_QUERY_BATCH_SIZE,
+    max_wait=settings.EMBEDDING_QUERY_MAX_WAIT_MS / 1000,
+)
+
+
+async def aembed_query(query: str) -> np.ndarray:
+    """Return a float32 1-D array of shape (D,); concurrent cache misses are batched into one encode."""
+    key = _normalize_query(query)
+    vector = _cached_query_vector(key)
+    if vector is None:
+        vector = await _query_batcher.embed(query)
+        _cache_query_vector(key, vector)
+    return vector
+
+
+async def shutdown_query_batcher() -> None:
+    """Stop the background batching task (app shutdown)."""
+    await _query_batcher.aclose()
@@ -1,7 +1,8 @@
 """LLM abstraction: Ollama (local, default) | Groq (free cloud) | OpenAI | Anthropic.
 
 Provider is chosen at runtime via LLM_PROVIDER env var.
-All providers implement the same `complete(prompt) -> str` interface.
+All providers implement the same `complete(prompt) -> str` interface, plus
+`stream(prompt)` which yields the answer text as it is generated.
 
 Recommended for cloud deployment: Groq (free tier, fast, llama3 support).
 Get a free key at: https://console.groq.com
@@ -10,37 +11,82 @@ Get a free key at: https://console.groq.com
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+
+import orjson
 
 from app.config import LLMProvider, settings
 from app.observability import get_logger
 
+__all__ = [
+    "AnthropicClient",
+    "GroqClient",
+    "LLMClient",
+    "OllamaClient",
+    "OpenAIClient",
+    "get_llm_client",
+    "shutdown_llm_client",
+]
+
 log = get_logger(__name__)
 
 
+def _messages(system: str, user: str) -> list[dict]:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+
 class LLMClient(ABC):
     @abstractmethod
     async def complete(self, system: str, user: str) -> str: ...
 
+    async def stream(self, system: str, user: str) -> AsyncIterator[str]:
+        """Yield the completion in pieces as it is generated (default: all at once)."""
+        yield await self.complete(system, user)
+
+    async def aclose(self) -> None:
+        """Release pooled connections (app shutdown)."""
+
 
 # ── Ollama (local) ────────────────────────────────────────────────────────────
 
 class OllamaClient(LLMClient):
-    async def complete(self, system: str, user: str) -> str:
+    def __init__(self) -> None:
         import httpx  # noqa: PLC0415
 
-        payload = {
-            "model": settings.OLLAMA_MODEL,
-            "messages": [
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            "stream": False,
-        }
-        async with httpx.AsyncClient(base_url=settings.OLLAMA_BASE_URL, timeout=120) as client:
-            resp = await client.post("/api/chat", json=payload)
+        # One pooled client for the process: keep-alive connections are reused
+        # across requests. Ollama speaks plain HTTP/1.1, so no HTTP/2 here.
+        self._client = httpx.AsyncClient(
+            base_url=settings.OLLAMA_BASE_URL,
+            headers={"Content-Type": "application/json"},
+            timeout=120,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+
+    async def complete(self, system: str, user: str) -> str:
+        payload = {"model": settings.OLLAMA_MODEL, "messages": _messages(system, user), "stream": False}
+        resp = await self._client.post("/api/chat", content=orjson.dumps(payload))
+        resp.raise_for_status()
+        return orjson.loads(resp.content)["message"]["content"]
+
+    async def stream(self, system: str, user: str) -> AsyncIterator[str]:
+        payload = {"model": settings.OLLAMA_MODEL, "messages": _messages(system, user), "stream": True}
+        async with self._client.stream("POST", "/api/chat", content=orjson.dumps(payload)) as resp:
             resp.raise_for_status()
-            data = resp.json()
-        return data["message"]["content"]
+            # newline-delimited JSON, one object per generated piece
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                data = orjson.loads(line)
+                if content := data.get("message", {}).get("content"):
+                    yield content
+                if data.get("done"):
+                    break
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
 
 # ── Groq (free cloud) ─────────────────────────────────────────────────────────
@@ -51,31 +97,48 @@ class GroqClient(LLMClient):
     Get a free API key at: https://console.groq.com
     """
 
-    async def complete(self, system: str, user: str) -> str:
+    def __init__(self) -> None:
         import httpx  # noqa: PLC0415
 
-        headers = {
-            "Authorization": f"Bearer {settings.GROQ_API_KEY}",
-            "Content-Type": "application/json",
-        }
-        payload = {
+        # Long-lived HTTP/2 client: the TLS handshake is paid once, and
+        # concurrent completions multiplex over the same connection.
+        self._client = httpx.AsyncClient(
+            base_url="https://api.groq.com/openai/v1",
+            headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}", "Content-Type": "application/json"},
+            timeout=60,
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        )
+
+    def _payload(self, system: str, user: str) -> dict:
+        return {
             "model": settings.GROQ_MODEL,
-            "messages": [
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
+            "messages": _messages(system, user),
             "max_tokens": 1024,
             "temperature": 0.1,
         }
-        async with httpx.AsyncClient(timeout=60) as client:
-            resp = await client.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-            )
+
+    async def complete(self, system: str, user: str) -> str:
+        resp = await self._client.post("/chat/completions", content=orjson.dumps(self._payload(system, user)))
+        resp.raise_for_status()
+        return orjson.loads(resp.content)["choices"][0]["message"]["content"]
+
+    async def stream(self, system: str, user: str) -> AsyncIterator[str]:
+        payload = {**self._payload(system, user), "stream": True}
+        async with self._client.stream("POST", "/chat/completions", content=orjson.dumps(payload)) as resp:
             resp.raise_for_status()
-            data = resp.json()
-        return data["choices"][0]["message"]["content"]
+            # OpenAI-style server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+            async for line in resp.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                data = line.removeprefix("data: ")
+                if data == "[DONE]":
+                    break
+                if delta := orjson.loads(data)["choices"][0]["delta"].get("content"):
+                    yield delta
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
 
 
 # ── OpenAI (optional) ─────────────────────────────────────────────────────────
@@ -87,17 +150,36 @@ class OpenAIClient(LLMClient):
         client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         resp = await client.chat.completions.create(
             model=settings.OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
+            messages=_messages(system, user),
         )
         return resp.choices[0].message.content or ""
 
+    async def stream(self, system: str, user: str) -> AsyncIterator[str]:
+        from openai import AsyncOpenAI  # noqa: PLC0415
+
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        chunks = await client.chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            messages=_messages(system, user),
+            stream=True,
+        )
+        async for chunk in chunks:
+            if chunk.choices and (delta := chunk.choices[0].delta.content):
+                yield delta
+
 
 # ── Anthropic (optional) ──────────────────────────────────────────────────────
 
+def _cached_system(system: str) -> list[dict]:
+    # The system prompt is identical on every call: mark it as a cacheable prefix
+    # so Anthropic can reuse the processed prompt instead of re-reading it.
+    return [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+
 class AnthropicClient(LLMClient):
+    def __init__(self) -> None:
+        log.info("prompt_cache_enabled", provider="anthropic")
+
     async def complete(self, system: str, user: str) -> str:
         import anthropic  # noqa: PLC0415
 
@@ -105,11 +187,24 @@ class AnthropicClient(LLMClient):
         msg = await client.messages.create(
             model=settings.ANTHROPIC_MODEL,
             max_tokens=1024,
-            system=system,
+            system=_cached_system(system),
             messages=[{"role": "user", "content": user}],
         )
         return msg.content[0].text
 
+    async def stream(self, system: str, user: str) -> AsyncIterator[str]:
+        import anthropic  # noqa: PLC0415
+
+        client = anthropic.AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        async with client.messages.stream(
+            model=settings.ANTHROPIC_MODEL,
+            max_tokens=1024,
+            system=_cached_system(system),
+            messages=[{"role": "user", "content": user}],
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
 
 # ── Factory ───────────────────────────────────────────────────────────────────
 
@@ -129,3 +224,11 @@ def get_llm_client() -> LLMClient:
             case LLMProvider.ANTHROPIC:
                 _client = AnthropicClient()
     return _client
+
+
+async def shutdown_llm_client() -> None:
+    """Close the provider's HTTP connections (app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -2,11 +2,17 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass, replace
+
+import numpy as np
+import orjson
+import xxhash
 
 from app.config import settings
 from app.observability import get_logger
-from app.rag.embedder import embed_query
+from app.rag.answer_cache import get_answer_cache
+from app.rag.embedder import aembed_query
 from app.rag.llm import get_llm_client
 from app.rag.vector_store import SearchResult, get_vector_store
 
@@ -41,43 +47,109 @@ class RAGResponse:
     has_evidence: bool
 
 
-async def run_rag(query: str) -> RAGResponse:
-    """Execute the full RAG pipeline for a user query."""
-    log.info("rag_query", query=query[:120])
+NO_EVIDENCE_ANSWER = "I don't have enough information in the knowledge base to answer that question."
 
-    # 1. Embed query
-    q_vec = embed_query(query)
 
-    # 2. Retrieve
-    store = get_vector_store()
-    results = await store.search(q_vec, top_k=settings.TOP_K)
+def _evidence_keys(results: list[SearchResult]) -> list[int]:
+    """Answer-cache evidence: a hash of each chunk's label and text (row IDs get reused)."""
+    return [xxhash.xxh3_64_intdigest(f"{r.source_label}\0{r.text}") for r in results]
 
-    # 3. Filter by similarity threshold
-    filtered = [r for r in results if r.score >= settings.SIMILARITY_THRESHOLD]
-    has_evidence = bool(filtered)
 
-    if not has_evidence and settings.STRICT_MODE:
-        log.warning("rag_no_evidence", query=query[:80])
-        return RAGResponse(
-            answer="I don't have enough information in the knowledge base to answer that question.",
-            citations=[],
-            retrieved_chunks=results,
-            has_evidence=False,
-        )
+async def _retrieve(query: str) -> tuple[np.ndarray, list[SearchResult]]:
+    """Embed the query and fetch the chunks above the similarity threshold."""
+    log.info("rag_query", query=query[:120])
+    q_vec = await aembed_query(query)
+    store = get_vector_store()
+    results = await store.search(q_vec, top_k=settings.TOP_K, threshold=settings.SIMILARITY_THRESHOLD)
+    return q_vec, results
+
 
-    # 4. Build context string
+def _build_prompt(query: str, results: list[SearchResult]) -> tuple[str, list[Citation]]:
+    """Number the retrieved chunks as sources and wrap them around the question."""
     context_lines: list[str] = []
     citations: list[Citation] = []
-    for i, chunk in enumerate(filtered, start=1):
+    for i, chunk in enumerate(results, start=1):
         context_lines.append(f"[Source {i}] ({chunk.source_label})\n{chunk.text}")
         citations.append(Citation(index=i, source_label=chunk.source_label, excerpt=chunk.text[:200]))
 
     context_block = "\n\n---\n\n".join(context_lines)
-    user_message = f"Context:\n\n{context_block}\n\n---\n\nQuestion: {query}"
+    return f"Context:\n\n{context_block}\n\n---\n\nQuestion: {query}", citations
+
+
+async def run_rag(query: str) -> RAGResponse:
+    """Execute the full RAG pipeline for a user query."""
+    # 1-2. Embed query, retrieve chunks above the similarity threshold (filtered by the store)
+    q_vec, results = await _retrieve(query)
+
+    # 3. Refuse without evidence in strict mode
+    has_evidence = bool(results)
+    if not has_evidence and settings.STRICT_MODE:
+        log.warning("rag_no_evidence", query=query[:80])
+        return RAGResponse(answer=NO_EVIDENCE_ANSWER, citations=[], retrieved_chunks=results, has_evidence=False)
 
-    # 5. LLM call
+    # 4. Reuse a cached answer when the question and its evidence both match
+    evidence = _evidence_keys(results)
+    if settings.ANSWER_CACHE_ENABLED:
+        cached = get_answer_cache().lookup(q_vec, evidence)
+        if cached is not None:
+            log.info("rag_cache_hit", sources=len(cached.citations))
+            return replace(cached, retrieved_chunks=results)
+
+    # 5. Build context string
+    user_message, citations = _build_prompt(query, results)
+
+    # 6. LLM call
     llm = get_llm_client()
     answer = await llm.complete(system=SYSTEM_PROMPT, user=user_message)
 
     log.info("rag_answer_generated", sources=len(citations), answer_len=len(answer))
-    return RAGResponse(answer=answer, citations=citations, retrieved_chunks=results, has_evidence=True)
+    response = RAGResponse(answer=answer, citations=citations, retrieved_chunks=results, has_evidence=True)
+    if settings.ANSWER_CACHE_ENABLED:
+        get_answer_cache().insert(q_vec, evidence, response)
+    return response
+
+
+def _stream_header(citations: list[Citation], has_evidence: bool) -> str:
+    return orjson.dumps({"citations": [asdict(c) for c in citations], "has_evidence": has_evidence}).decode() + "\n"
+
+
+async def run_rag_stream(query: str) -> AsyncIterator[str]:
+    """Streaming :func:`run_rag`.
+
+    Yields one JSON header line (``{"citations": [...], "has_evidence": bool}``)
+    followed by the answer text in chunks as the LLM produces them.
+    """
+    q_vec, results = await _retrieve(query)
+
+    if not results and settings.STRICT_MODE:
+        log.warning("rag_no_evidence", query=query[:80])
+        yield _stream_header([], False)
+        yield NO_EVIDENCE_ANSWER
+        return
+
+    evidence = _evidence_keys(results)
+    if settings.ANSWER_CACHE_ENABLED:
+        cached = get_answer_cache().lookup(q_vec, evidence)
+        if cached is not None:
+            log.info("rag_cache_hit", sources=len(cached.citations))
+            yield _stream_header(cached.citations, cached.has_evidence)
+            yield cached.answer
+            return
+
+    user_message, citations = _build_prompt(query, results)
+    # Citations are known before generation starts, so the client can render them immediately
+    yield _stream_header(citations, True)
+
+    parts: list[str] = []
+    async for token in get_llm_client().stream(system=SYSTEM_PROMPT, user=user_message):
+        parts.append(token)
+        yield token
+
+    answer = "".join(parts)
+    log.info("rag_answer_generated", sources=len(citations), answer_len=len(answer), streamed=True)
+    if settings.ANSWER_CACHE_ENABLED:
+        get_answer_cache().insert(
+            q_vec,
+            evidence,
+            RAGResponse(answer=answer, citations=citations, retrieved_chunks=results, has_evidence=True),
+        )
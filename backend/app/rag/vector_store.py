@@ -1,17 +1,19 @@
 """Vector store abstraction with two adapters.
 
-* DEV  – FAISS flat index persisted as a local file (SQLite stores metadata).
+* DEV  – FAISS index persisted as a local file, chunk metadata in an Arrow IPC sidecar.
 * PROD – pgvector via SQLAlchemy (requires the pgvector extension).
 """
 
 from __future__ import annotations
 
-import json
+import asyncio
+import contextlib
 import os
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
 import numpy as np
+import orjson
 
 from app.config import VectorStoreMode, settings
 from app.observability import get_logger
@@ -30,11 +32,23 @@ class SearchResult:
 # ── Abstract interface ────────────────────────────────────────────────────────
 
 class VectorStore(ABC):
+    async def add(self, chunk_id: int, text: str, source_label: str, vector: np.ndarray) -> None:
+        """Insert a single chunk; bulk callers should use :meth:`add_many`."""
+        await self.add_many([chunk_id], [text], [source_label], vector.reshape(1, -1))
+
     @abstractmethod
-    async def add(self, chunk_id: int, text: str, source_label: str, vector: np.ndarray) -> None: ...
+    async def add_many(
+        self,
+        chunk_ids: list[int],
+        texts: list[str],
+        source_labels: list[str],
+        vectors: np.ndarray,
+    ) -> None:
+        """Insert N chunks in one call; ``vectors`` has shape (N, D)."""
 
     @abstractmethod
-    async def search(self, query_vector: np.ndarray, top_k: int) -> list[SearchResult]: ...
+    async def search(self, query_vector: np.ndarray, top_k: int, threshold: float = -1.0) -> list[SearchResult]:
+        """Return up to ``top_k`` chunks with cosine score >= ``threshold``, best first (-1 keeps all)."""
 
     @abstractmethod
     async def delete_by_document(self, chunk_ids: list[int]) -> None: ...
@@ -43,86 +57,231 @@ class VectorStore(ABC):
     async def flush(self) -> None:
         """Persist to disk / commit (no-op for DB adapters)."""
 
+    async def prepare(self) -> None:
+        """One-off startup work (schema, ANN index builds); awaited from the app lifespan."""
+
+    async def aclose(self) -> None:
+        """Release connections and background work (app shutdown)."""
+
 
 # ── FAISS adapter (DEV) ───────────────────────────────────────────────────────
 
+_ARROW_MAGIC = b"ARROW1"
+
+
+def _meta_path_to_load(path: str) -> str | None:
+    """The metadata file to load: ``path``, or the ``.json`` sidecar an older install wrote next to it."""
+    if os.path.exists(path):
+        return path
+    legacy = os.path.splitext(path)[0] + ".json"
+    if legacy != path and os.path.exists(legacy):
+        log.info("faiss_meta_legacy_path", path=legacy)
+        return legacy
+    return None
+
+
+class _ChunkMeta:
+    """Chunk metadata looked up by chunk ID.
+
+    Persisted rows are an Arrow table, memory-mapped on load so startup parses
+    nothing; rows added since the last flush sit in plain lists until then.
+    ``_positions`` maps each chunk ID to its row across both.
+    """
+
+    def __init__(self, table=None) -> None:
+        import pyarrow as pa  # noqa: PLC0415
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [("chunk_id", pa.int64()), ("text", pa.large_string()), ("source_label", pa.string())]
+        )
+        self._table = table if table is not None else self._schema.empty_table()
+        self._pending_ids: list[int] = []
+        self._pending_texts: list[str] = []
+        self._pending_labels: list[str] = []
+        self._positions = self._index_rows()
+
+    @classmethod
+    def load(cls, path: str) -> _ChunkMeta:
+        import pyarrow as pa  # noqa: PLC0415
+
+        with open(path, "rb") as f:
+            is_arrow = f.read(len(_ARROW_MAGIC)) == _ARROW_MAGIC
+        if is_arrow:
+            return cls(pa.ipc.open_file(pa.memory_map(path)).read_all())
+
+        # Legacy JSON sidecar: list of {chunk_id, text, source_label}; rewritten as Arrow on next flush
+        log.info("faiss_meta_migrating_json", path=path)
+        with open(path, "rb") as f:
+            rows = orjson.loads(f.read())
+        meta = cls()
+        meta.extend(
+            [r["chunk_id"] for r in rows], [r["text"] for r in rows], [r["source_label"] for r in rows]
+        )
+        return meta
+
+    def __len__(self) -> int:
+        return self._table.num_rows + len(self._pending_ids)
+
+    def extend(self, chunk_ids: list[int], texts: list[str], source_labels: list[str]) -> None:
+        start = len(self)
+        self._positions.update(zip(chunk_ids, range(start, start + len(chunk_ids))))
+        self._pending_ids.extend(chunk_ids)
+        self._pending_texts.extend(texts)
+        self._pending_labels.extend(source_labels)
+
+    def get(self, chunk_id: int) -> tuple[str, str] | None:
+        """Return ``(text, source_label)`` for a chunk, or None if unknown."""
+        i = self._positions.get(chunk_id)
+        if i is None:
+            return None
+        n = self._table.num_rows
+        if i >= n:
+            return self._pending_texts[i - n], self._pending_labels[i - n]
+        return self._table.column("text")[i].as_py(), self._table.column("source_label")[i].as_py()
+
+    def chunk_ids(self) -> np.ndarray:
+        return np.concatenate(
+            [self._table.column("chunk_id").to_numpy(), np.asarray(self._pending_ids, dtype=np.int64)]
+        )
+
+    def remove(self, chunk_ids: list[int]) -> None:
+        keep = ~np.isin(self.chunk_ids(), np.asarray(chunk_ids, dtype=np.int64))
+        if keep.all():
+            return
+        self._table = self._combined().filter(self._pa.array(keep))
+        self._clear_pending()
+        self._positions = self._index_rows()
+
+    def save(self, path: str) -> None:
+        table = self._combined()
+        tmp_path = f"{path}.tmp"
+        with self._pa.OSFile(tmp_path, "wb") as sink, self._pa.ipc.new_file(sink, self._schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)   # readers holding the old mmap keep their inode
+        self._table = table
+        self._clear_pending()
+
+    def _combined(self):
+        if not self._pending_ids:
+            return self._table
+        pending = self._pa.table(
+            {
+                "chunk_id": self._pending_ids,
+                "text": self._pending_texts,
+                "source_label": self._pending_labels,
+            },
+            schema=self._schema,
+        )
+        return self._pa.concat_tables([self._table, pending]).combine_chunks()
+
+    def _index_rows(self) -> dict[int, int]:
+        ids = self.chunk_ids().tolist()
+        return dict(zip(ids, range(len(ids))))
+
+    def _clear_pending(self) -> None:
+        self._pending_ids = []
+        self._pending_texts = []
+        self._pending_labels = []
+
+
 class FAISSVectorStore(VectorStore):
-    """In-memory FAISS flat-IP index backed by a JSON metadata file."""
+    """In-memory FAISS inner-product index (flat or SQ8) backed by an Arrow metadata file.
+
+    Vectors are stored under their chunk ID (``IndexIDMap2``), so search hits map
+    straight to metadata and deletes are a single ``remove_ids`` pass.
+    """
 
     def __init__(self) -> None:
         import faiss  # noqa: PLC0415
 
         self._faiss = faiss
-        self._index: faiss.IndexFlatIP | None = None
-        self._meta: list[dict] = []   # parallel list to FAISS vectors
+        self._index: faiss.IndexIDMap2 | None = None
+        self._meta = _ChunkMeta()
         self._dim: int = 0
         self._load()
 
     def _load(self) -> None:
-        if os.path.exists(settings.FAISS_INDEX_PATH) and os.path.exists(settings.FAISS_META_PATH):
+        meta_path = _meta_path_to_load(settings.FAISS_META_PATH)
+        if os.path.exists(settings.FAISS_INDEX_PATH) and meta_path is not None:
             import faiss  # noqa: PLC0415
 
             log.info("faiss_loading_index", path=settings.FAISS_INDEX_PATH)
             self._index = faiss.read_index(settings.FAISS_INDEX_PATH)
-            with open(settings.FAISS_META_PATH) as f:
-                self._meta = json.load(f)
+            self._meta = _ChunkMeta.load(meta_path)  # flush always writes FAISS_META_PATH
             self._dim = self._index.d
+            if not isinstance(self._index, faiss.IndexIDMap2):
+                self._migrate_positional_index()
         else:
             self._index = None
 
+    def _migrate_positional_index(self) -> None:
+        # Indexes saved before ID mapping hold vectors in metadata row order.
+        log.info("faiss_migrating_to_id_map", total=self._index.ntotal)  # type: ignore[attr-defined]
+        vectors = self._index.reconstruct_n(0, self._index.ntotal)  # type: ignore[attr-defined]
+        self._index = self._new_index(self._dim)
+        if len(vectors):
+            self._index.add_with_ids(vectors, self._meta.chunk_ids())
+
+    def _new_index(self, dim: int):
+        faiss = self._faiss
+        if settings.FAISS_INDEX_TYPE == "flat":
+            return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        # 8-bit scalar quantisation: 4x less memory streamed per search. Vectors
+        # are L2-normalised, so every component lies in [-1, 1]; training on those
+        # bounds fixes the quantiser up front instead of waiting for sample data.
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        index.train(np.stack([-np.ones(dim, dtype=np.float32), np.ones(dim, dtype=np.float32)]))
+        return faiss.IndexIDMap2(index)
+
     def _ensure_index(self, dim: int) -> None:
         if self._index is None:
-            import faiss  # noqa: PLC0415
-
             self._dim = dim
-            self._index = faiss.IndexFlatIP(dim)
-
-    async def add(self, chunk_id: int, text: str, source_label: str, vector: np.ndarray) -> None:
-        self._ensure_index(vector.shape[0])
-        vec = vector.reshape(1, -1).astype(np.float32)
-        self._index.add(vec)  # type: ignore[attr-defined]
-        self._meta.append({"chunk_id": chunk_id, "text": text, "source_label": source_label})
+            self._index = self._new_index(dim)
+
+    async def add_many(
+        self,
+        chunk_ids: list[int],
+        texts: list[str],
+        source_labels: list[str],
+        vectors: np.ndarray,
+    ) -> None:
+        if not chunk_ids:
+            return
+        self._ensure_index(vectors.shape[1])
+        # no copy when the embedder already returned a C-contiguous float32 matrix
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._index.add_with_ids(vectors, np.asarray(chunk_ids, dtype=np.int64))  # type: ignore[attr-defined]
+        self._meta.extend(chunk_ids, texts, source_labels)
 
-    async def search(self, query_vector: np.ndarray, top_k: int) -> list[SearchResult]:
+    async def search(self, query_vector: np.ndarray, top_k: int, threshold: float = -1.0) -> list[SearchResult]:
         if self._index is None or self._index.ntotal == 0:  # type: ignore[attr-defined]
             return []
         k = min(top_k, self._index.ntotal)  # type: ignore[attr-defined]
         q = query_vector.reshape(1, -1).astype(np.float32)
         distances, indices = self._index.search(q, k)  # type: ignore[attr-defined]
+        # scores come back descending, so the threshold is a binary-search cut
+        cutoff = int(np.searchsorted(-distances[0], -threshold, side="right"))
         results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx < 0:
+        for dist, chunk_id in zip(distances[0][:cutoff], indices[0][:cutoff]):
+            if chunk_id < 0:
+                continue
+            chunk_id = int(chunk_id)
+            meta = self._meta.get(chunk_id)
+            if meta is None:
                 continue
-            meta = self._meta[idx]
+            text, source_label = meta
             results.append(
-                SearchResult(
-                    chunk_id=meta["chunk_id"],
-                    text=meta["text"],
-                    source_label=meta["source_label"],
-                    score=float(dist),
-                )
+                SearchResult(chunk_id=chunk_id, text=text, source_label=source_label, score=float(dist))
             )
         return results
 
     async def delete_by_document(self, chunk_ids: list[int]) -> None:
-        # FAISS flat index does not support deletion; rebuild without those IDs
-        if self._index is None:
+        if self._index is None or not chunk_ids:
             return
-        import faiss  # noqa: PLC0415
-
-        ids_to_remove = set(chunk_ids)
-        new_meta = []
-        new_vectors = []
-        for i, meta in enumerate(self._meta):
-            if meta["chunk_id"] not in ids_to_remove:
-                new_meta.append(meta)
-                vec = self._index.reconstruct(i)  # type: ignore[attr-defined]
-                new_vectors.append(vec)
-
-        self._index = faiss.IndexFlatIP(self._dim)
-        self._meta = new_meta
-        if new_vectors:
-            self._index.add(np.vstack(new_vectors))  # type: ignore[attr-defined]
+        ids = np.asarray(chunk_ids, dtype=np.int64)
+        self._index.remove_ids(self._faiss.IDSelectorBatch(ids.size, self._faiss.swig_ptr(ids)))  # type: ignore[attr-defined]
+        self._meta.remove(chunk_ids)
 
     async def flush(self) -> None:
         if self._index is None:
@@ -131,18 +290,21 @@ class FAISSVectorStore(VectorStore):
 
         os.makedirs(os.path.dirname(settings.FAISS_INDEX_PATH) or ".", exist_ok=True)
         faiss.write_index(self._index, settings.FAISS_INDEX_PATH)
-        with open(settings.FAISS_META_PATH, "w") as f:
-            json.dump(self._meta, f)
+        self._meta.save(settings.FAISS_META_PATH)
         log.info("faiss_index_saved", path=settings.FAISS_INDEX_PATH, total=self._index.ntotal)
 
 
 # ── pgvector adapter (PROD) ───────────────────────────────────────────────────
 
+_INDEX_BUILD_LOCK = 0x7663_6964_7862   # pg advisory lock key shared by every process building the ANN index
+
+
 class PGVectorStore(VectorStore):
     """pgvector adapter using raw asyncpg queries for performance."""
 
     def __init__(self) -> None:
         self._pool = None
+        self._index_task: asyncio.Task[None] | None = None
 
     async def _get_pool(self):
         if self._pool is None:
@@ -150,7 +312,11 @@ class PGVectorStore(VectorStore):
             from app.config import settings as s
 
             dsn = s.POSTGRES_DSN.replace("postgresql+asyncpg://", "postgresql://")
-            self._pool = await asyncpg.create_pool(dsn)
+            # Startup parameter rather than SET, so it survives the pool's RESET ALL on release
+            server_settings = (
+                {"hnsw.ef_search": str(s.PGVECTOR_HNSW_EF_SEARCH)} if s.PGVECTOR_INDEX_TYPE == "hnsw" else None
+            )
+            self._pool = await asyncpg.create_pool(dsn, server_settings=server_settings)
             await self._ensure_table()
         return self._pool
 
@@ -166,32 +332,107 @@ class PGVectorStore(VectorStore):
                     embedding   vector(384)
                 )
             """)
-            await conn.execute("""
-                CREATE INDEX IF NOT EXISTS vector_chunks_embedding_idx
-                ON vector_chunks USING ivfflat (embedding vector_cosine_ops)
-                WITH (lists = 100)
-            """)
 
-    async def add(self, chunk_id: int, text: str, source_label: str, vector: np.ndarray) -> None:
+    async def prepare(self) -> None:
+        await self._get_pool()
+        # In the background: on a large table the build outlasts any startup
+        # health check. Until it finishes, searches fall back to a sequential scan.
+        self._index_task = asyncio.create_task(self._build_index())
+
+    async def aclose(self) -> None:
+        if self._index_task is not None and not self._index_task.done():
+            # an interrupted concurrent build leaves an INVALID index; the next start rebuilds it
+            self._index_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._index_task
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def _build_index(self) -> None:
+        try:
+            await self._ensure_index()
+        except Exception as exc:
+            log.error("pgvector_index_build_failed", error=str(exc))
+
+    async def _ensure_index(self) -> None:
+        """Build the configured ANN index (dropping the other kind) without blocking writes.
+
+        Workers and replicas start together, so the check-drop-build sequence
+        runs under a session advisory lock: only one process builds, and an
+        index seen as INVALID can only be left over from a build that died,
+        never one still in progress elsewhere. CONCURRENTLY cannot run in a
+        transaction block, so each statement is sent on its own (asyncpg
+        autocommits them).
+        """
+        if settings.PGVECTOR_INDEX_TYPE == "hnsw":
+            # No training step and better recall per ms than IVFFlat's fixed lists
+            name, other = "vector_chunks_embedding_hnsw_idx", "vector_chunks_embedding_idx"
+            method = "hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)"
+        else:
+            name, other = "vector_chunks_embedding_idx", "vector_chunks_embedding_hnsw_idx"
+            method = "ivfflat (embedding vector_cosine_ops) WITH (lists = 100)"
+
+        async with self._pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", _INDEX_BUILD_LOCK)
+            try:
+                await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {other}")
+                valid = await conn.fetchval(
+                    "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)", name
+                )
+                if valid:
+                    return
+                if valid is False:
+                    # left INVALID by a build that died; IF NOT EXISTS would keep it forever
+                    await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                log.info("pgvector_building_index", index=name)
+                await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON vector_chunks USING {method}")
+                log.info("pgvector_index_ready", index=name)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", _INDEX_BUILD_LOCK)
+
+    async def add_many(
+        self,
+        chunk_ids: list[int],
+        texts: list[str],
+        source_labels: list[str],
+        vectors: np.ndarray,
+    ) -> None:
+        if not chunk_ids:
+            return
         pool = await self._get_pool()
-        async with pool.acquire() as conn:
+        # COPY (binary) into a per-connection temp table, then upsert with one
+        # INSERT ... SELECT: a single round trip regardless of chunk count.
+        # Embeddings travel as real[] (native asyncpg codec) and are cast server-side.
+        async with pool.acquire() as conn, conn.transaction():
+            await conn.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS vector_chunks_staging ("
+                "chunk_id INTEGER, text TEXT, source_label TEXT, embedding REAL[]"
+                ") ON COMMIT DELETE ROWS"
+            )
+            await conn.copy_records_to_table(
+                "vector_chunks_staging",
+                records=zip(chunk_ids, texts, source_labels, vectors.tolist()),
+                columns=["chunk_id", "text", "source_label", "embedding"],
+            )
             await conn.execute(
                 "INSERT INTO vector_chunks(chunk_id, text, source_label, embedding) "
-                "VALUES($1, $2, $3, $4::vector) ON CONFLICT (chunk_id) DO UPDATE "
-                "SET text=EXCLUDED.text, source_label=EXCLUDED.source_label, embedding=EXCLUDED.embedding",
-                chunk_id, text, source_label, vector.tolist(),
+                "SELECT chunk_id, text, source_label, embedding::vector FROM vector_chunks_staging "
+                "ON CONFLICT (chunk_id) DO UPDATE "
+                "SET text=EXCLUDED.text, source_label=EXCLUDED.source_label, embedding=EXCLUDED.embedding"
             )
 
-    async def search(self, query_vector: np.ndarray, top_k: int) -> list[SearchResult]:
+    async def search(self, query_vector: np.ndarray, top_k: int, threshold: float = -1.0) -> list[SearchResult]:
         pool = await self._get_pool()
         async with pool.acquire() as conn:
             rows = await conn.fetch(
                 "SELECT chunk_id, text, source_label, "
                 "1 - (embedding <=> $1::vector) AS score "
                 "FROM vector_chunks "
+                "WHERE embedding <=> $1::vector <= 1 - $3::float8 "
                 "ORDER BY embedding <=> $1::vector "
                 "LIMIT $2",
-                query_vector.tolist(), top_k,
+                query_vector.tolist(), top_k, threshold,
             )
         return [
             SearchResult(chunk_id=r["chunk_id"], text=r["text"], source_label=r["source_label"], score=float(r["score"]))
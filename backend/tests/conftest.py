@@ -0,0 +1,24 @@
+"""Shared pytest configuration for the backend test suite."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+# Test-only: cheapest bcrypt work factor. Set before app.config is imported so
+# Settings picks it up; verification still runs the real bcrypt code path.
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# Test-only: the integration tests run against an in-memory SQLite database.
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run the async tests on uvloop, the loop uvicorn serves the app with."""
+    try:
+        import uvloop  # noqa: PLC0415  (installed with uvicorn[standard]; not on Windows)
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
@@ -0,0 +1,55 @@
+"""Unit tests for the semantic answer cache."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from app.rag.answer_cache import SemanticAnswerCache
+from app.rag.pipeline import RAGResponse
+
+
+def _unit(v: np.ndarray) -> np.ndarray:
+    return (v / np.linalg.norm(v)).astype(np.float32)
+
+
+def _response(answer: str) -> RAGResponse:
+    return RAGResponse(answer=answer, citations=[], retrieved_chunks=[], has_evidence=True)
+
+
+class TestSemanticAnswerCache:
+    def setup_method(self):
+        self.rng = np.random.default_rng(42)
+        self.q = _unit(self.rng.standard_normal(384))
+
+    def test_exact_repeat_hits(self):
+        cache = SemanticAnswerCache()
+        cache.insert(self.q, [1, 2, 3], _response("cached"))
+        hit = cache.lookup(self.q, [1, 2, 3])
+        assert hit is not None
+        assert hit.answer == "cached"
+
+    def test_near_duplicate_hits(self):
+        cache = SemanticAnswerCache()
+        cache.insert(self.q, [1, 2, 3], _response("cached"))
+        paraphrase = _unit(self.q + 0.01 * self.rng.standard_normal(384))
+        assert cache.lookup(paraphrase, [1, 2, 3]) is not None
+
+    def test_unrelated_query_misses(self):
+        cache = SemanticAnswerCache()
+        cache.insert(self.q, [1, 2, 3], _response("cached"))
+        other = _unit(self.rng.standard_normal(384))
+        assert cache.lookup(other, [1, 2, 3]) is None
+
+    def test_changed_evidence_misses(self):
+        cache = SemanticAnswerCache(min_evidence_overlap=0.8)
+        cache.insert(self.q, [1, 2, 3], _response("cached"))
+        assert cache.lookup(self.q, [4, 5, 6]) is None
+
+    def test_fifo_eviction(self):
+        cache = SemanticAnswerCache(max_entries=2)
+        vectors = [_unit(self.rng.standard_normal(384)) for _ in range(3)]
+        for i, v in enumerate(vectors):
+            cache.insert(v, [i], _response(str(i)))
+        assert len(cache) == 2
+        assert cache.lookup(vectors[0], [0]) is None
+        assert cache.lookup(vectors[2], [2]).answer == "2"
@@ -37,6 +37,11 @@ class TestExtractSections:
         assert "preamble" in titles
         assert "Main Section" in titles
 
+    def test_body_whitespace_collapsed(self):
+        text = "# Skills\n  Python,\t\tFastAPI\u3000Docker\n\n"
+        sections = _extract_sections(text)
+        assert sections == [("Skills", "Python, FastAPI Docker")]
+
 
 # ── _split_by_tokens ──────────────────────────────────────────────────────────
 
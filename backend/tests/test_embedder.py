@@ -0,0 +1,81 @@
+"""Unit tests for the embedder's async helpers (model mocked out)."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import pytest_asyncio
+
+from app.config import settings
+from app.rag import embedder
+
+
+def _fake_embed(texts: list[str]) -> np.ndarray:
+    # one distinct row per text so results can be matched back to their query
+    return np.array([[float(len(t))] * 4 for t in texts], dtype=np.float32)
+
+
+class TestQueryBatching:
+    @pytest_asyncio.fixture(autouse=True)
+    async def _stop_batcher(self, monkeypatch):
+        embedder._query_cache.clear()
+        monkeypatch.setattr(embedder, "_tokenizer_lowercases", lambda: True)   # MiniLM is uncased
+        yield
+        await embedder.shutdown_query_batcher()
+
+    async def test_concurrent_queries_share_one_encode(self):
+        with patch("app.rag.embedder.embed_texts", side_effect=_fake_embed) as mock_embed:
+            queries = ["a", "bb", "ccc", "dddd", "eeeee"]
+            vectors = await asyncio.gather(*(embedder.aembed_query(q) for q in queries))
+
+        assert mock_embed.call_count == 1
+        assert [v[0] for v in vectors] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    async def test_encode_error_propagates_to_callers(self):
+        with patch("app.rag.embedder.embed_texts", side_effect=RuntimeError("model down")):
+            with pytest.raises(RuntimeError, match="model down"):
+                await embedder.aembed_query("hello")
+
+        # batcher keeps serving after a failed batch
+        with patch("app.rag.embedder.embed_texts", side_effect=_fake_embed):
+            vec = await embedder.aembed_query("hi")
+        assert vec[0] == 2.0
+
+    async def test_repeat_query_served_from_cache(self):
+        with patch("app.rag.embedder.embed_texts", side_effect=_fake_embed) as mock_embed:
+            first = await embedder.aembed_query("What is  your experience?")
+            again = await embedder.aembed_query("  what is your EXPERIENCE? ")
+
+        assert mock_embed.call_count == 1
+        np.testing.assert_array_equal(first, again)
+        assert mock_embed.call_args.args[0] == ["What is  your experience?"]   # encoded as typed
+
+    async def test_cased_tokenizer_keeps_case_in_cache_key(self, monkeypatch):
+        monkeypatch.setattr(embedder, "_tokenizer_lowercases", lambda: False)
+        with patch("app.rag.embedder.embed_texts", side_effect=_fake_embed) as mock_embed:
+            await embedder.aembed_query("Python experience?")
+            await embedder.aembed_query("python experience?")
+
+        assert mock_embed.call_count == 2
+        assert [c.args[0] for c in mock_embed.call_args_list] == [["Python experience?"], ["python experience?"]]
+
+    async def test_query_runs_between_ingest_batches(self, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_BATCH_SIZE", 2)
+
+        def slow_embed(texts: list[str]) -> np.ndarray:
+            time.sleep(0.05)   # one forward pass
+            return _fake_embed(texts)
+
+        with patch("app.rag.embedder.embed_texts", side_effect=slow_embed) as mock_embed:
+            ingest = asyncio.create_task(embedder.aembed_texts([f"chunk {i}" for i in range(8)]))
+            await asyncio.sleep(0.01)   # ingest is now encoding its first slice
+            await embedder.aembed_query("experience?")
+            assert not ingest.done()    # the query did not wait for the whole document
+            vectors = await ingest
+
+        assert vectors.shape == (8, 4)
+        assert mock_embed.call_count == 5   # 4 ingest slices + 1 query batch
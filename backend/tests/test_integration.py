@@ -6,39 +6,102 @@ Uses an in-memory SQLite DB and mocked vector store + LLM.
 from __future__ import annotations
 
 import io
+import json
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import numpy as np
 import pytest
 import pytest_asyncio
 from fastapi import status
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from app.auth.dependencies import _user_cache
+from app.auth.service import TokenData, create_access_token
 from app.main import app
-from app.models.database import AsyncSessionLocal, create_db_and_tables, engine
+from app.models.database import AsyncSessionLocal, create_db_and_tables, engine, get_db, get_session_factory
 from app.models.db import Base
 
 
+# pysqlite/aiosqlite defer BEGIN and never emit it for SAVEPOINT-only work;
+# hand transaction control to SQLAlchemy so per-test rollbacks are real.
+@event.listens_for(engine.sync_engine, "connect")
+def _sqlite_manual_transactions(dbapi_conn, _record) -> None:
+    dbapi_conn.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _sqlite_begin(conn) -> None:
+    conn.exec_driver_sql("BEGIN")
+
+
+# One loop for the whole module: the schema fixture is session-scoped
+pytestmark = pytest.mark.asyncio(scope="session")
+
+# Stand-in embeddings; the mocked embedder hands out one row per text. The
+# vector store is mocked too, so the values are never read.
+_FAKE_EMBEDDINGS = np.zeros((64, 384), dtype=np.float32)
+
+
 # ── Fixtures ──────────────────────────────────────────────────────────────────
 
-@pytest_asyncio.fixture(autouse=True)
-async def setup_db():
-    """Create fresh tables for each test."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+@pytest_asyncio.fixture(scope="session")
+async def _schema():
+    """Create the tables once for the whole run."""
+    await create_db_and_tables()
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
 
 
-@pytest_asyncio.fixture
-async def client():
-    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
-        yield c
+@pytest_asyncio.fixture(autouse=True)
+async def setup_db(_schema):
+    """Run each test in an outer transaction that is rolled back afterwards.
+
+    Request sessions join it through SAVEPOINTs, so the endpoints' own
+    commits stay inside the test.
+    """
+    _user_cache.clear()  # user IDs are reissued once a test's rows are rolled back
+    async with engine.connect() as conn:
+        await conn.begin()
+        sessionmaker = async_sessionmaker(
+            bind=conn, expire_on_commit=False, join_transaction_mode="create_savepoint"
+        )
+
+        async def _get_test_db():
+            async with sessionmaker() as session:
+                yield session
+
+        app.dependency_overrides[get_db] = _get_test_db
+        app.dependency_overrides[get_session_factory] = lambda: sessionmaker
+        yield sessionmaker
+        del app.dependency_overrides[get_db]
+        del app.dependency_overrides[get_session_factory]
+        await conn.rollback()
+
+
+@pytest.fixture
+def db_sessionmaker(setup_db):
+    """Session factory bound to the current test's transaction."""
+    return setup_db
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client(_schema):
+    """One client for the run; the app's lifespan (startup/shutdown) runs once around it."""
+    # ASGITransport does not send lifespan events itself, so drive them directly
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
+            yield c
+
 
+# The role users are registered once per run, before any test transaction is
+# opened, so they are committed and survive every per-test rollback. That keeps
+# bcrypt to one hash per role for the whole suite.
 
-@pytest_asyncio.fixture
-async def admin_token(client: AsyncClient):
+@pytest_asyncio.fixture(scope="session")
+async def admin_token(client: AsyncClient, _schema):
     """Register an admin user and return its JWT. Admin flag set directly in DB."""
     resp = await client.post("/api/users", json={
         "username": "admin",
@@ -46,7 +109,6 @@ async def admin_token(client: AsyncClient):
         "password": "adminpass123",
     })
     assert resp.status_code == 201, resp.text
-    token = resp.json()["token"]
 
     # Promote to admin directly in DB
     async with AsyncSessionLocal() as session:
@@ -55,16 +117,12 @@ async def admin_token(client: AsyncClient):
         await session.execute(update(User).where(User.username == "admin").values(is_admin=True))
         await session.commit()
 
-    # Re-login to get token with is_admin=True
-    resp2 = await client.post("/api/users/login", json={
-        "email": "admin@example.com",
-        "password": "adminpass123",
-    })
-    return resp2.json()["token"]
+    # Mint the is_admin token directly; a re-login would only repeat the bcrypt verify
+    return create_access_token(TokenData(sub="admin", is_admin=True))
 
 
-@pytest_asyncio.fixture
-async def user_token(client: AsyncClient):
+@pytest_asyncio.fixture(scope="session")
+async def user_token(client: AsyncClient, _schema):
     resp = await client.post("/api/users", json={
         "username": "regularuser",
         "email": "user@example.com",
@@ -94,26 +152,40 @@ class TestAuth:
         resp = await client.post("/api/users", json={**payload, "username": "u2"})
         assert resp.status_code == 422
 
-    async def test_login_wrong_password(self, client):
-        await client.post("/api/users", json={"username": "u", "email": "u@e.com", "password": "right"})
-        resp = await client.post("/api/users/login", json={"email": "u@e.com", "password": "wrong"})
-        assert resp.status_code == 401
+    async def test_profile_update_visible_on_next_request(self, client, user_token):
+        headers = {"Authorization": f"Bearer {user_token}"}
+        r1 = await client.get("/api/users/me", headers=headers)
+        assert r1.json()["bio"] is None
 
+        await client.put("/api/users/me", headers=headers, json={"bio": "Backend engineer"})
 
-# ── Ingest Tests ──────────────────────────────────────────────────────────────
+        r2 = await client.get("/api/users/me", headers=headers)
+        assert r2.json()["bio"] == "Backend engineer"
 
-class TestIngest:
-    @patch("app.api.ingest.get_vector_store")
-    @patch("app.api.ingest.embed_texts")
-    async def test_ingest_markdown(self, mock_embed, mock_store, client, admin_token):
-        import numpy as np
 
-        mock_embed.return_value = np.random.rand(5, 384).astype("float32")
-        store = AsyncMock()
-        store.add = AsyncMock()
-        store.flush = AsyncMock()
-        mock_store.return_value = store
+# ── Ingest Tests ──────────────────────────────────────────────────────────────
 
+class TestIngest:
+    @pytest.fixture(scope="class", autouse=True)
+    def _patched_deps(self):
+        """Patch the embedder and vector store once for the whole class."""
+        with (
+            patch("app.api.ingest.get_vector_store") as mock_store,
+            patch("app.api.ingest.aembed_texts") as mock_embed,
+        ):
+            mock_store.return_value = AsyncMock()
+            mock_embed.side_effect = lambda texts: _FAKE_EMBEDDINGS[: len(texts)]
+            yield mock_embed, mock_store
+
+    @pytest.fixture
+    def ingest_store(self, _patched_deps):
+        """The mocked vector store, with call records cleared for this test."""
+        mock_embed, mock_store = _patched_deps
+        mock_embed.reset_mock()
+        mock_store.return_value.reset_mock()
+        return mock_store.return_value
+
+    async def test_ingest_markdown(self, ingest_store, client, admin_token, db_sessionmaker):
         content = b"# Experience\nSoftware engineer at Acme Corp for 5 years.\n\n# Skills\nPython, FastAPI, Docker."
         resp = await client.post(
             "/api/ingest",
@@ -124,35 +196,25 @@ class TestIngest:
         data = resp.json()
         assert data["chunks_created"] > 0
         assert data["deduplicated"] is False
+        ingest_store.add_many.assert_awaited_once()
 
-    async def test_ingest_requires_admin(self, client, user_token):
-        content = b"Some content"
-        resp = await client.post(
-            "/api/ingest",
-            headers={"Authorization": f"Bearer {user_token}"},
-            files={"file": ("file.md", io.BytesIO(content), "text/markdown")},
-        )
-        assert resp.status_code == 403
+        async with db_sessionmaker() as session:
+            from app.models.db import Document
+            doc = await session.get(Document, data["document_id"])
+            assert doc.uploaded_by is not None
+
+    async def test_ingest_too_large(self, client, admin_token):
+        from app.api.ingest import MAX_FILE_SIZE
 
-    async def test_ingest_requires_auth(self, client):
-        content = b"Some content"
+        content = b"x" * (MAX_FILE_SIZE + 1)
         resp = await client.post(
             "/api/ingest",
-            files={"file": ("file.md", io.BytesIO(content), "text/markdown")},
+            headers={"Authorization": f"Bearer {admin_token}"},
+            files={"file": ("big.txt", io.BytesIO(content), "text/plain")},
         )
-        assert resp.status_code == 401
-
-    @patch("app.api.ingest.get_vector_store")
-    @patch("app.api.ingest.embed_texts")
-    async def test_ingest_deduplication(self, mock_embed, mock_store, client, admin_token):
-        import numpy as np
-
-        mock_embed.return_value = np.random.rand(2, 384).astype("float32")
-        store = AsyncMock()
-        store.add = AsyncMock()
-        store.flush = AsyncMock()
-        mock_store.return_value = store
+        assert resp.status_code == 413
 
+    async def test_ingest_deduplication(self, ingest_store, client, admin_token):
         content = b"# Skills\nPython, Docker."
         file_args = ("cv.md", io.BytesIO(content), "text/markdown")
 
@@ -173,6 +235,43 @@ class TestIngest:
         assert r2.status_code == 201
         assert r2.json()["deduplicated"] is True
 
+    async def test_ingest_batch(self, ingest_store, client, admin_token):
+        cv = b"# Experience\nSoftware engineer at Acme Corp for 5 years."
+        projects = b"# Projects\nBuilt a RAG system with FastAPI."
+        resp = await client.post(
+            "/api/ingest/batch",
+            headers={"Authorization": f"Bearer {admin_token}"},
+            files=[
+                ("files", ("cv.md", io.BytesIO(cv), "text/markdown")),
+                ("files", ("projects.md", io.BytesIO(projects), "text/markdown")),
+                ("files", ("cv-copy.md", io.BytesIO(cv), "text/markdown")),
+            ],
+        )
+        assert resp.status_code == 201
+        data = resp.json()
+        assert [d["filename"] for d in data] == ["cv.md", "projects.md", "cv-copy.md"]
+        assert [d["deduplicated"] for d in data] == [False, False, True]
+        assert data[2]["document_id"] == data[0]["document_id"]
+
+        ingest_store.add_many.assert_awaited_once()
+        indexed = ingest_store.add_many.await_args.kwargs
+        assert len(indexed["chunk_ids"]) == indexed["vectors"].shape[0] == sum(d["chunks_created"] for d in data)
+
+    async def test_ingest_batch_is_all_or_nothing(self, ingest_store, client, admin_token):
+        resp = await client.post(
+            "/api/ingest/batch",
+            headers={"Authorization": f"Bearer {admin_token}"},
+            files=[
+                ("files", ("cv.md", io.BytesIO(b"# Skills\nPython, Docker."), "text/markdown")),
+                ("files", ("image.png", io.BytesIO(b"not a document"), "image/png")),
+            ],
+        )
+        assert resp.status_code == 422
+        ingest_store.add_many.assert_not_awaited()
+
+        listing = await client.get("/api/ingest", headers={"Authorization": f"Bearer {admin_token}"})
+        assert listing.json() == []
+
 
 # ── Chat Tests ────────────────────────────────────────────────────────────────
 
@@ -220,18 +319,6 @@ class TestChat:
         assert data["has_evidence"] is False
         assert data["citations"] == []
 
-    async def test_chat_requires_auth(self, client):
-        resp = await client.post("/api/chat", json={"question": "Hello?"})
-        assert resp.status_code == 401
-
-    async def test_chat_empty_question(self, client, user_token):
-        resp = await client.post(
-            "/api/chat",
-            headers={"Authorization": f"Bearer {user_token}"},
-            json={"question": "   "},
-        )
-        assert resp.status_code == 422
-
     @patch("app.api.chat.run_rag")
     async def test_chat_session_continuity(self, mock_rag, client, user_token):
         from app.rag.pipeline import RAGResponse
@@ -254,6 +341,166 @@ class TestChat:
         )
         assert r2.json()["session_id"] == session_id
 
+    @patch("app.api.chat.run_rag")
+    async def test_session_history(self, mock_rag, client, user_token):
+        from app.rag.pipeline import RAGResponse
+
+        mock_rag.return_value = RAGResponse(
+            answer="Python [Source 1].", citations=[], retrieved_chunks=[], has_evidence=True
+        )
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        r1 = await client.post("/api/chat", headers=headers, json={"question": "Languages?"})
+        session_id = r1.json()["session_id"]
+
+        resp = await client.get(f"/api/chat/sessions/{session_id}/history", headers=headers)
+        assert resp.status_code == 200
+        assert [m["role"] for m in resp.json()] == ["user", "assistant"]
+
+        missing = await client.get("/api/chat/sessions/9999/history", headers=headers)
+        assert missing.status_code == 404
+
+    @patch("app.api.chat.run_rag_stream")
+    async def test_chat_stream(self, mock_stream, client, user_token):
+        async def tokens(question):
+            yield '{"citations":[],"has_evidence":true}\n'
+            for piece in ("Five years ", "at Acme [Source 1]."):
+                yield piece
+
+        mock_stream.side_effect = tokens
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        resp = await client.post("/api/chat/stream", headers=headers, json={"question": "Experience?"})
+        assert resp.status_code == 200
+        header, _, answer = resp.text.partition("\n")
+        meta = json.loads(header)
+        assert meta["has_evidence"] is True
+        assert answer == "Five years at Acme [Source 1]."
+
+        history = await client.get(f"/api/chat/sessions/{meta['session_id']}/history", headers=headers)
+        assert [m["content"] for m in history.json()] == ["Experience?", answer]
+
+    @patch("app.api.chat.run_rag_stream")
+    async def test_chat_stream_failure_is_signalled(self, mock_stream, client, user_token):
+        from app.api.chat import STREAM_ERROR_MARKER
+
+        async def tokens(question):
+            yield '{"citations":[],"has_evidence":true}\n'
+            yield "Five years "
+            raise RuntimeError("LLM connection reset")
+
+        mock_stream.side_effect = tokens
+        headers = {"Authorization": f"Bearer {user_token}"}
+
+        resp = await client.post("/api/chat/stream", headers=headers, json={"question": "Experience?"})
+        assert resp.status_code == 200
+        _, _, rest = resp.text.partition("\n")
+        partial, marker, trailer = rest.partition(STREAM_ERROR_MARKER)
+        assert partial == "Five years "
+        assert marker
+        assert "LLM connection reset" in json.loads(trailer)["error"]
+
+        # The session was created before the failure and is still the caller's, just empty
+        meta = json.loads(resp.text.partition("\n")[0])
+        history = await client.get(f"/api/chat/sessions/{meta['session_id']}/history", headers=headers)
+        assert history.status_code == 200
+        assert history.json() == []
+
+
+# ── End-to-end RAG Tests ──────────────────────────────────────────────────────
+
+class _EchoLLM:
+    """Answers with the prompt it was given, so the answer shows which evidence it saw."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def complete(self, system: str, user: str) -> str:
+        self.calls += 1
+        return user
+
+
+class TestRagRoundTrip:
+    @pytest.fixture
+    def rag_env(self, tmp_path, monkeypatch):
+        """Real FAISS store and answer cache; constant embeddings and an echoing LLM."""
+        from app.config import settings
+        from app.rag import answer_cache, vector_store
+
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path / "rt.index"))
+        monkeypatch.setattr(settings, "FAISS_META_PATH", str(tmp_path / "rt_meta.arrow"))
+        monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", True)
+        monkeypatch.setattr(vector_store, "_store", None)
+        monkeypatch.setattr(answer_cache, "_cache", None)
+
+        unit = np.zeros(384, dtype=np.float32)
+        unit[0] = 1.0
+        llm = _EchoLLM()
+
+        async def embed_texts(texts):
+            return np.tile(unit, (len(texts), 1))
+
+        async def embed_query(query):
+            return unit
+
+        with (
+            patch("app.api.ingest.aembed_texts", side_effect=embed_texts),
+            patch("app.rag.pipeline.aembed_query", side_effect=embed_query),
+            patch("app.rag.pipeline.get_llm_client", return_value=llm),
+        ):
+            yield llm
+
+    async def test_edited_document_gets_a_fresh_answer(self, rag_env, client, admin_token, user_token):
+        admin = {"Authorization": f"Bearer {admin_token}"}
+        user = {"Authorization": f"Bearer {user_token}"}
+        question = {"question": "Where does the candidate work?"}
+
+        async def upload(content: bytes) -> int:
+            resp = await client.post(
+                "/api/ingest", headers=admin, files={"file": ("cv.md", io.BytesIO(content), "text/markdown")}
+            )
+            assert resp.status_code == 201 and resp.json()["deduplicated"] is False
+            return resp.json()["document_id"]
+
+        doc_id = await upload(b"# Experience\nSoftware engineer at Acme Corp.")
+        first = (await client.post("/api/chat", headers=user, json=question)).json()
+        again = (await client.post("/api/chat", headers=user, json=question)).json()
+        assert "Acme Corp" in first["answer"]
+        assert again["answer"] == first["answer"]
+        assert rag_env.calls == 1   # repeat served from the answer cache
+
+        # SQLite hands the deleted chunks' row IDs to the edited document's chunks
+        assert (await client.delete(f"/api/ingest/{doc_id}", headers=admin)).status_code == 204
+        await upload(b"# Experience\nStaff engineer at Globex Inc.")
+
+        fresh = (await client.post("/api/chat", headers=user, json=question)).json()
+        assert rag_env.calls == 2
+        assert "Globex Inc" in fresh["answer"] and "Acme Corp" not in fresh["answer"]
+
+
+# ── Guard Tests ───────────────────────────────────────────────────────────────
+
+_UPLOAD = {"files": {"file": ("file.md", b"Some content", "text/markdown")}}
+
+
+@pytest.mark.parametrize(
+    ("path", "as_user", "request_kwargs", "expected"),
+    [
+        pytest.param("/api/chat", False, {"json": {"question": "Hello?"}}, 401, id="chat-requires-auth"),
+        pytest.param("/api/chat", True, {"json": {"question": "   "}}, 422, id="chat-empty-question"),
+        pytest.param("/api/ingest", False, _UPLOAD, 401, id="ingest-requires-auth"),
+        pytest.param("/api/ingest", True, _UPLOAD, 403, id="ingest-requires-admin"),
+        pytest.param(
+            "/api/users/login", False, {"json": {"email": "user@example.com", "password": "wrong"}}, 401,
+            id="login-wrong-password",
+        ),
+    ],
+)
+async def test_request_rejected(client, user_token, path, as_user, request_kwargs, expected):
+    headers = {"Authorization": f"Bearer {user_token}"} if as_user else {}
+    resp = await client.post(path, headers=headers, **request_kwargs)
+    assert resp.status_code == expected
+
 
 # ── Health Tests ──────────────────────────────────────────────────────────────
 
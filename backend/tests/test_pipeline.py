@@ -0,0 +1,64 @@
+"""Unit tests for the streaming RAG pipeline (embedder, store and LLM mocked)."""
+
+from __future__ import annotations
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.rag.llm import LLMClient
+from app.rag.pipeline import NO_EVIDENCE_ANSWER, SearchResult, run_rag_stream
+
+
+class _FakeLLM(LLMClient):
+    async def complete(self, system: str, user: str) -> str:
+        return "unused"
+
+    async def stream(self, system: str, user: str):
+        for piece in ("Five years ", "at Acme ", "[Source 1]."):
+            yield piece
+
+
+def _store(results: list[SearchResult]) -> MagicMock:
+    store = MagicMock()
+    store.search = AsyncMock(return_value=results)
+    return store
+
+
+async def _collect(query: str) -> tuple[dict, list[str]]:
+    lines = [part async for part in run_rag_stream(query)]
+    return json.loads(lines[0]), lines[1:]
+
+
+@pytest.fixture(autouse=True)
+def _no_answer_cache(monkeypatch):
+    monkeypatch.setattr(settings, "ANSWER_CACHE_ENABLED", False)
+
+
+@patch("app.rag.pipeline.aembed_query", AsyncMock(return_value=np.zeros(4, dtype=np.float32)))
+class TestRunRagStream:
+    async def test_header_then_tokens(self):
+        hit = SearchResult(chunk_id=1, text="5 years at Acme", source_label="cv.md § Experience", score=0.8)
+        with (
+            patch("app.rag.pipeline.get_vector_store", return_value=_store([hit])),
+            patch("app.rag.pipeline.get_llm_client", return_value=_FakeLLM()),
+        ):
+            header, tokens = await _collect("How many years?")
+
+        assert header["has_evidence"] is True
+        assert header["citations"][0]["source_label"] == "cv.md § Experience"
+        assert "".join(tokens) == "Five years at Acme [Source 1]."
+
+    async def test_no_evidence_strict_mode(self):
+        with (
+            patch("app.rag.pipeline.get_vector_store", return_value=_store([])),
+            patch("app.rag.pipeline.get_llm_client") as mock_llm,
+        ):
+            header, tokens = await _collect("Unrelated?")
+
+        assert header == {"citations": [], "has_evidence": False}
+        assert tokens == [NO_EVIDENCE_ANSWER]
+        mock_llm.assert_not_called()
@@ -0,0 +1,147 @@
+"""Unit tests for the FAISS (DEV) vector store adapter."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.rag.vector_store import FAISSVectorStore
+
+
+def _unit_rows(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    v = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path / "test.index"))
+    monkeypatch.setattr(settings, "FAISS_META_PATH", str(tmp_path / "test_meta.arrow"))
+    return FAISSVectorStore()
+
+
+async def _fill(store: FAISSVectorStore, vectors: np.ndarray) -> None:
+    n = len(vectors)
+    await store.add_many(
+        chunk_ids=list(range(100, 100 + n)),
+        texts=[f"text {i}" for i in range(n)],
+        source_labels=[f"doc.md § {i}" for i in range(n)],
+        vectors=vectors,
+    )
+
+
+class TestFAISSVectorStore:
+    async def test_search_returns_nearest_first(self, store):
+        vectors = _unit_rows(10)
+        await _fill(store, vectors)
+
+        results = await store.search(vectors[3], top_k=3)
+        assert results[0].chunk_id == 103
+        assert results[0].text == "text 3"
+        assert results[0].score == pytest.approx(1.0, abs=0.02)
+        assert [r.score for r in results] == sorted((r.score for r in results), reverse=True)
+
+    async def test_search_threshold(self, store):
+        vectors = _unit_rows(10)
+        await _fill(store, vectors)
+
+        results = await store.search(vectors[3], top_k=10, threshold=0.9)
+        assert [r.chunk_id for r in results] == [103]
+        assert len(await store.search(vectors[3], top_k=10, threshold=-1.0)) == 10
+
+    async def test_search_empty_store(self, store):
+        assert await store.search(_unit_rows(1)[0], top_k=5) == []
+
+    async def test_single_add(self, store):
+        vectors = _unit_rows(3)
+        await _fill(store, vectors[:2])
+        await store.add(7, "single", "one.md", vectors[2])
+
+        results = await store.search(vectors[2], top_k=1)
+        assert (results[0].chunk_id, results[0].text) == (7, "single")
+
+    async def test_delete_by_document(self, store):
+        vectors = _unit_rows(10)
+        await _fill(store, vectors)
+
+        await store.delete_by_document([103, 104])
+        results = await store.search(vectors[3], top_k=10)
+        ids = {r.chunk_id for r in results}
+        assert len(results) == 8
+        assert not ids & {103, 104}
+
+    async def test_flush_and_reload(self, store):
+        vectors = _unit_rows(5)
+        await _fill(store, vectors)
+        await store.flush()
+
+        reloaded = FAISSVectorStore()
+        results = await reloaded.search(vectors[1], top_k=1)
+        assert results[0].chunk_id == 101
+        assert results[0].source_label == "doc.md § 1"
+
+    async def test_delete_after_reload(self, store):
+        vectors = _unit_rows(6)
+        await _fill(store, vectors)
+        await store.flush()
+
+        reloaded = FAISSVectorStore()
+        await reloaded.add_many([200], ["late"], ["late.md"], _unit_rows(1, seed=1))
+        await reloaded.delete_by_document([101, 200])
+        ids = {r.chunk_id for r in await reloaded.search(vectors[0], top_k=10)}
+        assert ids == {100, 102, 103, 104, 105}
+
+    async def test_legacy_json_meta_is_migrated(self, store):
+        vectors = _unit_rows(3)
+        await _fill(store, vectors)
+        await store.flush()
+        rows = [{"chunk_id": 100 + i, "text": f"text {i}", "source_label": f"doc.md § {i}"} for i in range(3)]
+        with open(settings.FAISS_META_PATH, "w") as f:
+            json.dump(rows, f)
+
+        reloaded = FAISSVectorStore()
+        results = await reloaded.search(vectors[2], top_k=1)
+        assert results[0].text == "text 2"
+
+        await reloaded.flush()
+        with open(settings.FAISS_META_PATH, "rb") as f:
+            assert f.read(6) == b"ARROW1"
+
+    async def test_upgrade_from_json_sidecar_next_to_arrow_path(self, tmp_path, monkeypatch):
+        import faiss
+
+        # An older install: positional index + faiss_meta.json, with FAISS_META_PATH now *.arrow
+        vectors = _unit_rows(3)
+        legacy = faiss.IndexFlatIP(vectors.shape[1])
+        legacy.add(vectors)
+        faiss.write_index(legacy, str(tmp_path / "faiss.index"))
+        rows = [{"chunk_id": 100 + i, "text": f"text {i}", "source_label": f"doc.md § {i}"} for i in range(3)]
+        (tmp_path / "faiss_meta.json").write_text(json.dumps(rows))
+        monkeypatch.setattr(settings, "FAISS_INDEX_PATH", str(tmp_path / "faiss.index"))
+        monkeypatch.setattr(settings, "FAISS_META_PATH", str(tmp_path / "faiss_meta.arrow"))
+
+        upgraded = FAISSVectorStore()
+        assert (await upgraded.search(vectors[1], top_k=1))[0].text == "text 1"
+
+        await upgraded.flush()
+        with open(tmp_path / "faiss_meta.arrow", "rb") as f:
+            assert f.read(6) == b"ARROW1"
+        assert (await FAISSVectorStore().search(vectors[2], top_k=1))[0].chunk_id == 102
+
+    async def test_positional_index_is_migrated_to_id_map(self, store):
+        import faiss
+
+        vectors = _unit_rows(4)
+        await _fill(store, vectors)
+        await store.flush()
+        legacy = faiss.IndexFlatIP(vectors.shape[1])   # pre-ID-map layout: row i == metadata row i
+        legacy.add(vectors)
+        faiss.write_index(legacy, settings.FAISS_INDEX_PATH)
+
+        reloaded = FAISSVectorStore()
+        assert (await reloaded.search(vectors[2], top_k=1))[0].chunk_id == 102
+        await reloaded.delete_by_document([102])
+        assert (await reloaded.search(vectors[2], top_k=1))[0].chunk_id != 102
@@ -5,7 +5,10 @@ Main page: authenticated chat with cited RAG answers.
 
 from __future__ import annotations
 
+import itertools
+import json
 import os
+from typing import Iterator
 
 import httpx
 import streamlit as st
@@ -14,6 +17,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 API_BASE = os.getenv("API_BASE_URL", "http://backend:8000")
+STREAM_ERROR_MARKER = "\x1e"   # same as app.api.chat.STREAM_ERROR_MARKER in the backend
+
+_SESSION_DEFAULTS = {
+    "token": None,
+    "username": None,
+    "is_admin": False,
+    "session_id": None,
+    "messages": [],
+    "_admin_ok": False,   # admin page's memoised access check
+}
 
 st.set_page_config(
     page_title="AI Career Assistant",
@@ -23,25 +36,27 @@ st.set_page_config(
 )
 
 # ── Session state defaults ────────────────────────────────────────────────────
-for key, default in {
-    "token": None,
-    "username": None,
-    "is_admin": False,
-    "session_id": None,
-    "messages": [],
-}.items():
-    if key not in st.session_state:
-        st.session_state[key] = default
+for key, default in _SESSION_DEFAULTS.items():
+    st.session_state.setdefault(key, default)
 
 
 # ── API helpers ───────────────────────────────────────────────────────────────
 
+@st.cache_resource
+def _http() -> httpx.Client:
+    """One pooled client for every rerun, so keep-alive connections are reused."""
+    return httpx.Client(
+        base_url=API_BASE,
+        timeout=httpx.Timeout(120.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+    )
+
+
 def api_post(path: str, json: dict | None = None, auth: bool = True) -> dict:
     headers = {}
     if auth and st.session_state.token:
         headers["Authorization"] = f"Bearer {st.session_state.token}"
-    with httpx.Client(base_url=API_BASE, timeout=120) as client:
-        resp = client.post(path, json=json, headers=headers)
+    resp = _http().post(path, json=json, headers=headers)
     resp.raise_for_status()
     return resp.json()
 
@@ -50,12 +65,35 @@ def api_get(path: str, auth: bool = True) -> dict | list:
     headers = {}
     if auth and st.session_state.token:
         headers["Authorization"] = f"Bearer {st.session_state.token}"
-    with httpx.Client(base_url=API_BASE, timeout=30) as client:
-        resp = client.get(path, headers=headers)
+    resp = _http().get(path, headers=headers, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
 
+def _stream_answer(resp: httpx.Response, meta: dict) -> Iterator[str]:
+    """Yield the answer text of a /api/chat/stream response.
+
+    The first line is a JSON header (citations, evidence flag, session ID);
+    it is parsed into ``meta`` before any text is yielded. Raises
+    ``RuntimeError`` if the backend reports that generation failed partway.
+    """
+    chunks = resp.iter_text()
+    buffered = ""
+    for chunk in chunks:
+        buffered += chunk
+        if "\n" in buffered:
+            break
+    header, _, rest = buffered.partition("\n")
+    meta.update(json.loads(header))
+    for chunk in itertools.chain([rest], chunks):
+        text, marker, trailer = chunk.partition(STREAM_ERROR_MARKER)
+        if text:
+            yield text
+        if marker:
+            trailer += "".join(chunks)
+            raise RuntimeError(json.loads(trailer)["error"])
+
+
 # ── Auth sidebar ──────────────────────────────────────────────────────────────
 
 def render_sidebar():
@@ -107,8 +145,8 @@ def render_sidebar():
                 st.session_state.messages = []
                 st.rerun()
             if st.button("Logout", use_container_width=True):
-                for k in ("token", "username", "is_admin", "session_id", "messages"):
-                    st.session_state[k] = None if k == "token" else ([] if k == "messages" else None)
+                st.session_state.update(_SESSION_DEFAULTS, messages=[])  # fresh list, not the shared default
+                st.session_state.pop("docs", None)  # admin page's document list
                 st.rerun()
 
         st.divider()
@@ -142,39 +180,48 @@ def render_chat():
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        # Call API
+        # Call API, rendering the answer as it streams in
         with st.chat_message("assistant"):
-            with st.spinner("Thinking…"):
+            try:
+                payload: dict = {"question": prompt}
+                if st.session_state.session_id:
+                    payload["session_id"] = st.session_state.session_id
+
+                meta: dict = {}
+                headers = {"Authorization": f"Bearer {st.session_state.token}"}
+                streamed = st.empty()   # cleared again if the answer breaks off
                 try:
-                    payload: dict = {"question": prompt}
-                    if st.session_state.session_id:
-                        payload["session_id"] = st.session_state.session_id
-
-                    data = api_post("/api/chat", json=payload)
-                    st.session_state.session_id = data["session_id"]
-
-                    answer = data["answer"]
-                    citations = data.get("citations", [])
-
-                    st.markdown(answer)
-                    if citations:
-                        with st.expander(f"📚 {len(citations)} source(s)", expanded=False):
-                            for c in citations:
-                                st.markdown(f"**[Source {c['index']}]** `{c['source_label']}`")
-                                st.caption(f"> {c['excerpt']}")
-
-                    if not data.get("has_evidence"):
-                        st.warning("⚠️ No relevant evidence found in the knowledge base.")
-
-                    st.session_state.messages.append({
-                        "role": "assistant",
-                        "content": answer,
-                        "citations": citations,
-                    })
-                except Exception as e:
-                    error_msg = f"Error: {e}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    with _http().stream("POST", "/api/chat/stream", json=payload, headers=headers) as resp:
+                        resp.raise_for_status()
+                        with streamed.container():
+                            answer = st.write_stream(_stream_answer(resp, meta))
+                except RuntimeError:
+                    streamed.empty()
+                    raise
+                finally:
+                    # the session exists as soon as the header arrives, even if the answer fails
+                    if "session_id" in meta:
+                        st.session_state.session_id = meta["session_id"]
+
+                citations = meta.get("citations", [])
+                if citations:
+                    with st.expander(f"📚 {len(citations)} source(s)", expanded=False):
+                        for c in citations:
+                            st.markdown(f"**[Source {c['index']}]** `{c['source_label']}`")
+                            st.caption(f"> {c['excerpt']}")
+
+                if not meta.get("has_evidence"):
+                    st.warning("⚠️ No relevant evidence found in the knowledge base.")
+
+                st.session_state.messages.append({
+                    "role": "assistant",
+                    "content": answer,
+                    "citations": citations,
+                })
+            except Exception as e:
+                error_msg = f"Error: {e}"
+                st.error(error_msg)
+                st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 
 # ── Entry point ───────────────────────────────────────────────────────────────
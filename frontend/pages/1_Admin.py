@@ -5,6 +5,7 @@ Accessible only to admin users (enforced by API).
 
 from __future__ import annotations
 
+import asyncio
 import os
 
 import httpx
@@ -14,16 +15,80 @@ from dotenv import load_dotenv
 load_dotenv()
 
 API_BASE = os.getenv("API_BASE_URL", "http://backend:8000")
+MAX_CONCURRENT_DELETES = 16
 
 st.set_page_config(page_title="Admin – Document Manager", page_icon="🔧", layout="wide")
 
 
+@st.cache_resource
+def _http() -> httpx.Client:
+    """One pooled client for every rerun, so keep-alive connections are reused."""
+    return httpx.Client(
+        base_url=API_BASE,
+        timeout=httpx.Timeout(120.0, connect=5.0),
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+    )
+
+
 def _headers() -> dict:
     if st.session_state.get("token"):
         return {"Authorization": f"Bearer {st.session_state['token']}"}
     return {}
 
 
+@st.cache_data(ttl=15, show_spinner=False)
+def _list_docs(token: str) -> list:
+    """Document list, reused across reruns; cleared after every upload or delete."""
+    resp = _http().get("/api/ingest", headers={"Authorization": f"Bearer {token}"}, timeout=30)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def _delete_docs(token: str, doc_ids: list[int]) -> list[int]:
+    """Delete several documents concurrently; return the IDs that could not be deleted."""
+    slots = asyncio.Semaphore(MAX_CONCURRENT_DELETES)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async with httpx.AsyncClient(base_url=API_BASE, timeout=30) as client:
+        async def delete(doc_id: int) -> bool:
+            async with slots:
+                resp = await client.delete(f"/api/ingest/{doc_id}", headers=headers)
+            return resp.is_success
+
+        results = await asyncio.gather(*(delete(i) for i in doc_ids), return_exceptions=True)
+    return [doc_id for doc_id, ok in zip(doc_ids, results) if ok is not True]
+
+
+def _drop_docs(doc_ids: set[int]) -> None:
+    """Remove deleted documents from the page's copy of the list."""
+    st.session_state["docs"] = [d for d in st.session_state["docs"] if d["id"] not in doc_ids]
+    _list_docs.clear()
+
+
+def _delete_doc(doc: dict) -> None:
+    """Delete button callback: runs before the rerun, so the row is gone when it renders."""
+    try:
+        r = _http().delete(f"/api/ingest/{doc['id']}", headers=_headers(), timeout=30)
+        r.raise_for_status()
+    except Exception as e:
+        st.error(f"Delete failed: {e}")
+        return
+    _drop_docs({doc["id"]})
+    st.toast(f"Deleted {doc['filename']}.")
+
+
+def _delete_selected() -> None:
+    """Bulk-delete button callback."""
+    selected = st.session_state["selected_docs"]
+    failed = asyncio.run(_delete_docs(st.session_state["token"], selected))
+    _drop_docs(set(selected) - set(failed))
+    st.session_state["selected_docs"] = failed
+    if failed:
+        st.error(f"Delete failed for {len(failed)} document(s); they are still selected.")
+    else:
+        st.toast(f"Deleted {len(selected)} document(s).")
+
+
 def _require_admin():
     if not st.session_state.get("token"):
         st.error("You must be logged in. Please return to the main page.")
@@ -33,7 +98,11 @@ def _require_admin():
         st.stop()
 
 
-_require_admin()
+# Checked once per login: the main page's logout resets _admin_ok with the rest
+# of the session. The API enforces admin access on every call regardless.
+if not st.session_state.get("_admin_ok"):
+    _require_admin()
+    st.session_state["_admin_ok"] = True
 
 st.title("🔧 Admin – Document Manager")
 st.caption("Upload, list, and delete documents in the RAG knowledge base.")
@@ -50,14 +119,16 @@ uploaded = st.file_uploader(
 if uploaded and st.button("Ingest Document", type="primary"):
     with st.spinner("Ingesting…"):
         try:
-            with httpx.Client(base_url=API_BASE, timeout=120) as client:
-                resp = client.post(
-                    "/api/ingest",
-                    headers=_headers(),
-                    files={"file": (uploaded.name, uploaded.getvalue(), uploaded.type)},
-                )
+            uploaded.seek(0)  # hand httpx the file object itself; it reads it in blocks
+            resp = _http().post(
+                "/api/ingest",
+                headers=_headers(),
+                files={"file": (uploaded.name, uploaded, uploaded.type)},
+            )
             resp.raise_for_status()
             data = resp.json()
+            _list_docs.clear()
+            st.session_state.pop("docs", None)
             if data["deduplicated"]:
                 st.warning(f"⚠️ Document already exists (deduplicated). Document ID: {data['document_id']}")
             else:
@@ -76,20 +147,30 @@ st.divider()
 st.subheader("📚 Knowledge Base Documents")
 
 if st.button("🔄 Refresh", key="refresh_docs"):
-    st.rerun()
+    _list_docs.clear()
+    st.session_state.pop("docs", None)
 
-try:
-    with httpx.Client(base_url=API_BASE, timeout=30) as client:
-        resp = client.get("/api/ingest", headers=_headers())
-    resp.raise_for_status()
-    docs = resp.json()
-except Exception as e:
-    st.error(f"Failed to load documents: {e}")
-    docs = []
+# Deletes update this copy in place; the backend is re-read only on upload or refresh
+if "docs" not in st.session_state:
+    try:
+        st.session_state["docs"] = _list_docs(st.session_state["token"])
+    except Exception as e:
+        st.error(f"Failed to load documents: {e}")
+docs = st.session_state.get("docs", [])
 
 if not docs:
     st.info("No documents ingested yet. Upload a document above to get started.")
 else:
+    filenames = {doc["id"]: doc["filename"] for doc in docs}
+    # keep the selection to documents still listed (a widget value outside its options is an error)
+    if "selected_docs" in st.session_state:
+        st.session_state["selected_docs"] = [i for i in st.session_state["selected_docs"] if i in filenames]
+    selected = st.multiselect(
+        "Select documents", options=list(filenames), format_func=filenames.get, key="selected_docs"
+    )
+    if selected:
+        st.button(f"🗑️ Delete {len(selected)} selected", key="del_selected", on_click=_delete_selected)
+
     for doc in docs:
         col1, col2, col3, col4 = st.columns([3, 1, 2, 1])
         with col1:
@@ -99,15 +180,7 @@ else:
         with col3:
             st.caption(doc["created_at"])
         with col4:
-            if st.button("🗑️ Delete", key=f"del_{doc['id']}"):
-                try:
-                    with httpx.Client(base_url=API_BASE, timeout=30) as client:
-                        r = client.delete(f"/api/ingest/{doc['id']}", headers=_headers())
-                    r.raise_for_status()
-                    st.success("Deleted.")
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Delete failed: {e}")
+            st.button("🗑️ Delete", key=f"del_{doc['id']}", on_click=_delete_doc, args=(doc,))
 
 st.divider()
 
@@ -116,8 +189,7 @@ st.subheader("🩺 System Health")
 
 if st.button("Check health"):
     try:
-        with httpx.Client(base_url=API_BASE, timeout=10) as client:
-            resp = client.get("/health")
+        resp = _http().get("/health", timeout=10)
         resp.raise_for_status()
         h = resp.json()
         st.json(h)